@@ -0,0 +1,267 @@
+"""
+Offline benchmarks of the extraction, normalization and output stages.
+
+Every benchmark runs on the saved pages and string corpora in benchmarks/fixtures and
+fixtures/, without network access or a browser. The webdriver and script extraction
+modes need a live browser and are not covered; the lxml path they fall back to is.
+
+Usage:
+    python benchmarks/bench.py
+    python benchmarks/bench.py --rounds 10 --records 5000 --output results.json
+    python benchmarks/bench.py --compare benchmarks/results/<old commit>.json
+"""
+from typing import (Callable, Dict, List)
+
+import subprocess
+import tracemalloc
+import tempfile
+import argparse
+import platform
+import json
+import time
+import sys
+import os
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from util.extract import (compile_xpaths, content_xpaths, extract_from_html)
+from util.normalize import (normalize_prices, normalize_records, normalize_sale_dates, parse_sale_date)
+from util.gen_util import (CsvWriter, convert_str_to_number, store_to_csv)
+from util.sinks import (SqliteWriter, ParquetWriter, ArrowIpcWriter)
+from lxml import html
+
+FIXTURES = os.path.join(ROOT, 'benchmarks', 'fixtures')
+RESULTS = os.path.join(ROOT, 'benchmarks', 'results')
+CHANNELS = {'buy': 'realestateau', 'sold': 'realestateau_sold'}
+
+
+def _read(path: str) -> str:
+    with open(path, encoding="utf8") as f:
+        return f.read()
+
+
+def _xpaths(config: str) -> dict:
+    return json.loads(_read(os.path.join(ROOT, 'config_files', f"{config}.json")))['scraper_config']['xpath']
+
+
+def _headers() -> List[str]:
+    return json.loads(_read(os.path.join(ROOT, 'config_files', 'realestateau.json')))['scraper_config']['file_headers']
+
+
+# best wall time over rounds plus the peak traced allocation of one extra round
+def measure(fn: Callable[[], int], rounds: int) -> dict:
+    fn()
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        records = fn()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'records': records,
+        'seconds': round(best, 6),
+        'records_per_sec': round(records / best, 1) if best else None,
+        'peak_bytes': peak
+    }
+
+
+def extraction_benchmarks(copies: int) -> Dict[str, Callable[[], int]]:
+    benchmarks = {}
+    for channel, config in CHANNELS.items():
+        xpaths = _xpaths(config)
+        compiled = compile_xpaths(content_xpaths(xpaths))
+        listing = _read(os.path.join(FIXTURES, f"{channel}_listing.html"))
+        results = _read(os.path.join(FIXTURES, f"{channel}_results.html"))
+        link_xpath = xpaths['link_xpath']
+
+        def extract_listing(page=listing, compiled=compiled):
+            for _ in range(copies):
+                extract_from_html(page, compiled)
+            return copies
+
+        def extract_links(page=results, link_xpath=link_xpath):
+            links = 0
+            for _ in range(copies):
+                links += len(html.fromstring(page).xpath(f"{link_xpath}/@href"))
+            return links
+
+        benchmarks[f"extract.lxml.{channel}_listing"] = extract_listing
+        benchmarks[f"extract.lxml.{channel}_results_links"] = extract_links
+    return benchmarks
+
+
+def normalization_benchmarks(records: int) -> Dict[str, Callable[[], int]]:
+    prices = [entry['text'] for entry in json.loads(_read(os.path.join(ROOT, 'fixtures', 'price_strings.json')))]
+    dates = [entry['text'] for entry in json.loads(_read(os.path.join(FIXTURES, 'sale_dates.json')))]
+    price_texts = (prices * (records // len(prices) + 1))[:records]
+    date_texts = (dates * (records // len(dates) + 1))[:records]
+    # every text different, so no work is shared between repeated labels
+    distinct_prices = [f"${400000 + 50 * i:,} - ${450000 + 50 * i:,}" for i in range(records)]
+
+    raws = []
+    for channel, config in CHANNELS.items():
+        compiled = compile_xpaths(content_xpaths(_xpaths(config)))
+        raw = extract_from_html(_read(os.path.join(FIXTURES, f"{channel}_listing.html")), compiled)
+        raw['address_url'] = f"https://www.realestate.com.au/{channel}"
+        raws.append(raw)
+    # the listing pages with the price and date corpora swapped in
+    raw_records = [
+        dict(raw, address_listing_price=price, date=date)
+        for raw, price, date in zip(raws * (records // len(raws) + 1), price_texts, date_texts)
+    ]
+
+    def prices_vectorized():
+        normalize_prices(price_texts)
+        return len(price_texts)
+
+    def prices_legacy():
+        for text in price_texts:
+            convert_str_to_number(text)
+        return len(price_texts)
+
+    def distinct_prices_vectorized():
+        normalize_prices(distinct_prices)
+        return len(distinct_prices)
+
+    def distinct_prices_legacy():
+        for text in distinct_prices:
+            convert_str_to_number(text)
+        return len(distinct_prices)
+
+    def sale_dates_cold():
+        parse_sale_date.cache_clear()
+        normalize_sale_dates(date_texts)
+        return len(date_texts)
+
+    def sale_dates_warm():
+        normalize_sale_dates(date_texts)
+        return len(date_texts)
+
+    def records_batch():
+        normalize_records(raw_records)
+        return len(raw_records)
+
+    return {
+        'normalize.prices': prices_vectorized,
+        'normalize.prices_legacy_convert_str_to_number': prices_legacy,
+        'normalize.distinct_prices': distinct_prices_vectorized,
+        'normalize.distinct_prices_legacy_convert_str_to_number': distinct_prices_legacy,
+        'normalize.sale_dates_cold_cache': sale_dates_cold,
+        'normalize.sale_dates_warm_cache': sale_dates_warm,
+        'normalize.records_batch': records_batch
+    }
+
+
+def sink_benchmarks(records: int, workdir: str) -> Dict[str, Callable[[], int]]:
+    headers = _headers()
+    compiled = compile_xpaths(content_xpaths(_xpaths('realestateau')))
+    raw = extract_from_html(_read(os.path.join(FIXTURES, 'buy_listing.html')), compiled)
+    rows = [
+        dict(record, address_url=f"https://www.realestate.com.au/property-{i}")
+        for i, record in enumerate(normalize_records([raw] * records))
+    ]
+
+    def sink(factory, extension):
+        def run():
+            path = os.path.join(workdir, f"bench{extension}")
+            if os.path.exists(path):
+                os.remove(path)
+            writer = factory(path)
+            for row in rows:
+                writer.write(row)
+            writer.close()
+            return len(rows)
+        return run
+
+    def legacy_csv():
+        path = os.path.join(workdir, 'legacy.csv')
+        if os.path.exists(path):
+            os.remove(path)
+        for row in rows:
+            store_to_csv(row, path, headers)
+        return len(rows)
+
+    benchmarks = {
+        'sink.csv': sink(lambda path: CsvWriter(path, headers, flush_every=500), '.csv'),
+        'sink.csv_legacy_store_to_csv': legacy_csv,
+        'sink.sqlite': sink(lambda path: SqliteWriter(path, headers, flush_every=500, flush_interval=0.5), '.db')
+    }
+    try:
+        import pyarrow
+        benchmarks['sink.parquet'] = sink(lambda path: ParquetWriter(path, headers), '.parquet')
+        benchmarks['sink.arrow'] = sink(lambda path: ArrowIpcWriter(path, headers), '.arrow')
+    except ImportError:
+        print("pyarrow is not installed, skipping the columnar sinks")
+    return benchmarks
+
+
+def _commit() -> str:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, check=True
+        ).stdout.decode('utf8').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def compare(results: dict, baseline_path: str) -> None:
+    baseline = json.loads(_read(baseline_path))['results']
+    print(f"\n{'benchmark':<50} {'baseline rec/s':>15} {'now rec/s':>12} {'change':>8}")
+    for name, result in results.items():
+        old = baseline.get(name)
+        if not old or not old['records_per_sec'] or not result['records_per_sec']:
+            continue
+        change = result['records_per_sec'] / old['records_per_sec'] - 1
+        print(f"{name:<50} {old['records_per_sec']:>15.1f} {result['records_per_sec']:>12.1f} {change:>+8.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", help="timed rounds per benchmark, the best is kept", type=int, default=5)
+    parser.add_argument("--records", help="records per normalization/sink round", type=int, default=2000)
+    parser.add_argument("--pages", help="page copies per extraction round", type=int, default=50)
+    parser.add_argument("--filter", help="only run benchmarks whose name contains this", required=False)
+    parser.add_argument("--output", "-o", help="results file (default: benchmarks/results/<commit>.json)", required=False)
+    parser.add_argument("--compare", "-c", help="earlier results file to compare against", required=False)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        benchmarks = {}
+        benchmarks.update(extraction_benchmarks(args.pages))
+        benchmarks.update(normalization_benchmarks(args.records))
+        benchmarks.update(sink_benchmarks(args.records, workdir))
+
+        results = {}
+        for name, fn in benchmarks.items():
+            if args.filter and args.filter not in name:
+                continue
+            results[name] = measure(fn, args.rounds)
+            result = results[name]
+            print(f"{name:<50} {result['records_per_sec']:>12.1f} rec/s {result['peak_bytes']:>12} peak bytes")
+
+    commit = _commit()
+    output = args.output or os.path.join(RESULTS, f"{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding="utf8") as f:
+        json.dump({
+            'commit': commit,
+            'timestamp': time.time(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'rounds': args.rounds,
+            'results': results
+        }, f, indent=4)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
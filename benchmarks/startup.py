@@ -0,0 +1,117 @@
+"""
+Startup-time benchmarks of the CLI and the scraper module.
+
+Every command runs in a fresh interpreter, the best wall time over the rounds is kept.
+The bare interpreter is measured too, so the cost of the repo's own imports is the
+difference to it. --importtime lists the slowest imports of `import scraper`.
+
+Usage:
+    python benchmarks/startup.py
+    python benchmarks/startup.py --rounds 20 --importtime
+    python benchmarks/startup.py --compare benchmarks/results/startup-<old commit>.json
+"""
+from typing import (Dict, List)
+
+import subprocess
+import argparse
+import platform
+import json
+import time
+import sys
+import os
+
+from bench import (ROOT, RESULTS, _commit)
+
+COMMANDS = {
+    'python': [sys.executable, '-c', 'pass'],
+    'import.scraper': [sys.executable, '-c', 'import scraper'],
+    'import.run': [sys.executable, '-c', 'import run'],
+    'cli.help': [sys.executable, 'run.py', '--help'],
+    'cli.check_config': [sys.executable, 'run.py', '--file', 'realestateau', '--check-config']
+}
+
+
+# best wall time of the command, None when it fails (e.g. a CLI flag older commits do not have)
+def measure(command: List[str], rounds: int) -> dict:
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        try:
+            subprocess.run(command, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        except subprocess.CalledProcessError as e:
+            return {'seconds': None, 'error': f"exit status {e.returncode}"}
+        best = min(best, time.perf_counter() - start)
+    return {'seconds': round(best, 6)}
+
+
+# (module, cumulative microseconds) of the slowest imports below `import scraper`
+def slowest_imports(limit: int = 15) -> List[tuple]:
+    stderr = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import scraper'], cwd=ROOT, capture_output=True, check=True
+    ).stderr.decode('utf8')
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, module = line.split('|')
+        # everything up to site is the interpreter's own startup
+        if module.strip() == 'site':
+            imports = []
+            continue
+        imports.append((module.rstrip(), int(cumulative)))
+    return sorted(imports, key=lambda item: item[1], reverse=True)[:limit]
+
+
+def compare(results: Dict[str, dict], baseline_path: str) -> None:
+    with open(baseline_path, encoding="utf8") as f:
+        baseline = json.load(f)['results']
+    print(f"\n{'command':<25} {'baseline ms':>12} {'now ms':>10} {'change':>8}")
+    for name, result in results.items():
+        old = baseline.get(name)
+        if not old or not old['seconds'] or not result['seconds']:
+            continue
+        change = result['seconds'] / old['seconds'] - 1
+        print(f"{name:<25} {old['seconds'] * 1000:>12.1f} {result['seconds'] * 1000:>10.1f} {change:>+8.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", help="runs per command, the best is kept", type=int, default=10)
+    parser.add_argument("--importtime", help="list the slowest imports of the scraper module", action="store_true")
+    parser.add_argument("--output", "-o", help="results file (default: benchmarks/results/startup-<commit>.json)", required=False)
+    parser.add_argument("--compare", "-c", help="earlier results file to compare against", required=False)
+    args = parser.parse_args()
+
+    results = {}
+    for name, command in COMMANDS.items():
+        results[name] = measure(command, args.rounds)
+        if results[name]['seconds'] is None:
+            print(f"{name:<25} failed, {results[name]['error']}")
+        else:
+            print(f"{name:<25} {results[name]['seconds'] * 1000:>10.1f} ms")
+
+    if args.importtime:
+        print(f"\n{'module':<50} {'cumulative ms':>14}")
+        for module, cumulative in slowest_imports():
+            print(f"{module:<50} {cumulative / 1000:>14.1f}")
+
+    commit = _commit()
+    output = args.output or os.path.join(RESULTS, f"startup-{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding="utf8") as f:
+        json.dump({
+            'commit': commit,
+            'timestamp': time.time(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'rounds': args.rounds,
+            'results': results
+        }, f, indent=4)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
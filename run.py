@@ -1,7 +1,12 @@
-from scraper import Scraper
-from util.gen_util import load_json_config
+from util.gen_util import (load_json_config, check_scraper_config, set_logging)
+from util.scheduler import (Job, JobScheduler, load_jobs)
+from urllib.parse import urlparse
 
 import argparse
+import signal
+import sys
+import os
+import re
 
 """
 code meta found in __init__.py top level code directory
@@ -14,18 +19,178 @@ Usage:
     Another sample:
         python run.py --file realestate --keyword melbourne --max_pages 10 --output scrape.csv
 
+    Parallel browsers:
+        python run.py --file realestateau --keyword melbourne --workers 4
+
+    Continue a crashed or interrupted crawl where it stopped:
+        python run.py --file realestateau --keyword melbourne --resume
+
+    Record every fetched listing page, then re-run extraction over the recording without a browser:
+        python run.py --file realestateau --keyword melbourne --archive pages/
+        python run.py --file realestateau --archive pages/ --replay --output replayed.csv
+
+    Validate config files (and the configs of a job file) without starting a browser:
+        python run.py --file realestateau --check-config
+        python run.py --jobs jobs.json --check-config
+
+    Many keywords/configs from a job file, 4 at a time over shared warm browsers:
+        python run.py --jobs jobs.json --concurrency 4
+        jobs.json: [{"config": "realestateau", "keyword": "melbourne", "max_pages": 10, "priority": 1,
+                     "output": "melbourne.csv"}, ...]
+
 """
 
 
+# turn SIGTERM into a normal exit so buffered output is flushed and every browser quits
+def _exit_on_sigterm(signum, frame):
+    raise SystemExit(f"Received signal {signum}")
+
+
+# per-job scraper config: job keyword, page budget and output over the job's config file
+def _job_config(job: Job, args) -> dict:
+    config = load_json_config(job.config)['scraper_config']
+    config.update(job.overrides)
+    slug = re.sub(r'[^A-Za-z0-9]+', '_', job.keyword or 'all').strip('_').lower()
+
+    if job.keyword:
+        config['keyword'] = job.keyword
+    if job.max_pages:
+        config['max_num_of_pages'] = job.max_pages
+    config['outfile'] = job.output or f"{job.config}_{slug}.csv"
+    config['checkpoint_path'] = f"{job.config}.{slug}.checkpoint.db"
+    config['resume'] = args.resume
+    if args.seen_index:
+        config['seen_index_path'] = args.seen_index
+    if args.freshness_hours is not None:
+        config['freshness_hours'] = args.freshness_hours
+    if args.archive:
+        # one archive per job, archives are appended to by a single scraper at a time
+        config['archive_path'] = os.path.join(args.archive, f"{job.config}.{slug}")
+    return config
+
+
+# host a config crawls, configs of the same site share one rate limiter
+def _site(config: dict) -> str:
+    return urlparse(config.get('main_url') or config.get('login_url') or '').netloc
+
+
+# prints the problems of every config to run, returns the exit status
+def check_configs(args) -> int:
+    if args.jobs:
+        configs = {job.name: (job.config, job.overrides) for job in load_jobs(args.jobs)}
+    else:
+        configs = {args.file: (args.file, {})}
+
+    status = 0
+    for name, (config_name, overrides) in configs.items():
+        config_file = load_json_config(config_name)
+        if config_file is None or 'scraper_config' not in config_file:
+            problems = [f"config_files/{config_name}.json has no scraper_config"]
+        else:
+            problems = check_scraper_config(dict(config_file['scraper_config'], **overrides))
+        for problem in problems:
+            print(f"{name}: {problem}")
+        if problems:
+            status = 1
+        else:
+            print(f"{name}: OK")
+    return status
+
+
+def run_jobs(args) -> None:
+    # the scraper imports selenium and its helpers, only paid for by an actual crawl
+    from scraper import Scraper
+    from util.metrics import Metrics
+
+    rate_limiters = {}
+    jobs = load_jobs(args.jobs)
+
+    # one metrics endpoint per process: every session and job reports to it, so a port is bound once
+    metrics = None
+    for job in jobs:
+        metrics_config = dict(load_json_config(job.config)['scraper_config'], **job.overrides).get('metrics')
+        if metrics_config is not None:
+            metrics = Metrics(**metrics_config).start()
+            break
+
+    # a session is a Scraper owning a warm browser (and http session), lent to every job it runs
+    def open_session(config_name: str) -> Scraper:
+        config = load_json_config(config_name)['scraper_config']
+        config['workers'] = 1
+        return Scraper(**config, shared_metrics=metrics)
+
+    def run_job(job: Job, session: 'Scraper') -> None:
+        config = _job_config(job, args)
+        scrape = Scraper(
+            **config,
+            driver=session.driver,
+            http_fetcher=session.http_fetcher,
+            shared_metrics=metrics,
+            # one limiter per host, shared by every session and config crawling it
+            rate_limiter=rate_limiters.setdefault(_site(config), session.rate_limiter)
+        )
+        try:
+            scrape.paging_task()
+        finally:
+            scrape.quit_browser()
+
+    scheduler = JobScheduler(
+        run_job=run_job,
+        open_session=open_session,
+        close_session=lambda session: session.quit_browser(),
+        concurrency=args.concurrency
+    )
+    for job in jobs:
+        scheduler.submit(job)
+
+    try:
+        results = scheduler.run()
+    except KeyboardInterrupt:
+        print("Interrupted. Shutting down browsers..")
+        return
+    finally:
+        if metrics is not None:
+            metrics.close()
+    for name, status in sorted(results.items()):
+        print(f"{name}: {status}")
+
+
 def main():
     parser = argparse.ArgumentParser()
 
-    parser.add_argument("--file", "-f", help="name of config file to fetch", required=True)
+    parser.add_argument("--file", "-f", help="name of config file to fetch", required=False)
+    parser.add_argument("--jobs", "-j", help="JSON job file of {config, keyword, max_pages, priority, output}", required=False)
+    parser.add_argument("--concurrency", help="jobs run at the same time with --jobs", type=int, default=2)
     parser.add_argument("--output", "-o", help="save filename", required=False)
     parser.add_argument("--keyword", "-k", help="keyword search", required=False)
     parser.add_argument("--max_pages", "-m", help="maximum number of pagination crawling", required=False)
+    parser.add_argument("--workers", "-w", help="number of parallel browser workers", type=int, required=False)
+    parser.add_argument("--checkpoint", "-c", help="crawl checkpoint file (default: <config>.checkpoint.db)", required=False)
+    parser.add_argument("--resume", "-r", help="resume the last crawl from its checkpoint", action="store_true")
+    parser.add_argument("--seen_index", "-s", help="index of scraped listings, fresh ones are skipped", required=False)
+    parser.add_argument("--freshness_hours", help="skip listings scraped within this many hours", type=float, required=False)
+    parser.add_argument("--archive", "-a", help="directory of the compressed archive of fetched listing pages", required=False)
+    parser.add_argument("--replay", help="re-run extraction over the pages in --archive, no browser or network", action="store_true")
+    parser.add_argument("--check-config", help="validate the config(s) and exit", action="store_true")
     args = parser.parse_args()
 
+    if not args.file and not args.jobs:
+        parser.error("one of --file or --jobs is required")
+    if args.replay and (not args.archive or not args.file):
+        parser.error("--replay needs --file and --archive")
+
+    if args.check_config:
+        sys.exit(check_configs(args))
+
+    # By default, logging is set to stdout print in terminal
+    # this can be changed by manually setting the config in gen_util
+    set_logging()
+    signal.signal(signal.SIGTERM, _exit_on_sigterm)
+
+    if args.jobs:
+        run_jobs(args)
+        return
+
     config_file = load_json_config(args.file)
 
     if args.output:
@@ -37,10 +202,32 @@ def main():
     if args.max_pages:
         config_file['scraper_config']['max_num_of_pages'] = args.max_pages
 
+    if args.workers:
+        config_file['scraper_config']['workers'] = args.workers
+
+    config_file['scraper_config']['checkpoint_path'] = args.checkpoint or f"{args.file}.checkpoint.db"
+    config_file['scraper_config']['resume'] = args.resume
+
+    if args.seen_index:
+        config_file['scraper_config']['seen_index_path'] = args.seen_index
+
+    if args.freshness_hours is not None:
+        config_file['scraper_config']['freshness_hours'] = args.freshness_hours
+
+    if args.archive:
+        config_file['scraper_config']['archive_path'] = args.archive
+    config_file['scraper_config']['replay'] = args.replay
+
+    from scraper import Scraper
+
     # Instantiate Scraper object and pass keyword args dict
     scrape = Scraper(**config_file['scraper_config'])
-    links = scrape.paging_task()
-    scrape.quit_browser()  # Explicit quitting of browser after scraping
+    try:
+        links = scrape.paging_task()
+    except KeyboardInterrupt:
+        print("Interrupted. Shutting down browsers..")
+    finally:
+        scrape.quit_browser()  # Explicit quitting of browser after scraping, also on Ctrl-C
 
 
 if __name__ == '__main__':
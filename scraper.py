@@ -1,39 +1,60 @@
-from selenium import webdriver
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.common.by import By
-from selenium.webdriver.common.proxy import Proxy, ProxyType
-from selenium.webdriver.support.expected_conditions import staleness_of
+from __future__ import annotations
+
+# selenium.webdriver, requests, numpy and asyncio are imported where they are first needed, so importing
+# the scraper (e.g. to check a config or replay an archive) stays fast. the exceptions are cheap
 from selenium.common.exceptions import (
     NoSuchElementException,
     ElementNotInteractableException,
-    TimeoutException
+    TimeoutException,
+    WebDriverException
 )
-from selenium.webdriver.firefox.options import Options
-from util.gen_util import (
-    set_logging,
-    store_to_csv,
-    get_proxies,
-    convert_str_to_number
+from lxml.etree import (ParserError, XMLSyntaxError)
+from util.gen_util import get_proxies
+from util.extract import (
+    content_xpaths,
+    compile_xpaths,
+    extract_from_html,
+    extract_with_script,
+    extract_with_webdriver,
+    snapshot_html
 )
-from typing import (List, Dict)
+from util.normalize import normalize_records
+from util.browser_pool import (BrowserPool, DriverLost)
+from util.grid import Grid
+from util.checkpoint import (CrawlCheckpoint, DONE, FAILED)
+from util.seen_index import SeenIndex
+from util.sinks import open_sink
+from util.rate_limit import AdaptiveRateLimiter
+from util.readiness import wait_for_xpaths
+from util.proxy_pool import ProxyPool
+from util.recycle import BrowserRecycler
+from util.metrics import (Metrics, NULL_METRICS)
+from util.archive import PageArchive
+from typing import (List, Dict, TYPE_CHECKING)
+from contextlib import contextmanager
+from urllib.parse import urlparse
 
-import dateparser
 import time
 import itertools
 import logging
 import sys
 import re
-import random
 import os
 import json
+import threading
+
+if TYPE_CHECKING:
+    from selenium import webdriver
+    from util.http_fetch import HttpFetcher
+    from util.crawler import AsyncCrawler
+    from util.filter_proxy import FilteringProxy
+    from util.profiles import ProfileCache
 
 
-# By default, logging is set to stdout print in terminal
-# this can be changed by manually setting the config in gen_util
-set_logging()
 log = logging.getLogger(__name__)
 
+PAGE_TITLE = re.compile(r'<title[^>]*>(.*?)</title>', re.IGNORECASE | re.DOTALL)
+
 
 class Scraper(object):
     def __init__(self, **kwargs: dict) -> None:
@@ -48,16 +69,64 @@ class Scraper(object):
             main_url (Required) -- primary url to collect pagination links (if applicable)
             xpath (Required)-- collection of xpath selectors expressed in dict/json format
             proxy (Optional) -- to be used when proxy is necessary in scraping, module for creation
+            proxy_pool (Optional) -- proxy pool settings: cache_path, ttl_hours, size, rotate ('browser' or
+                'request'), failure_threshold, cooldown (seconds an ejected proxy is left out), probe_url
             keyword (Optional) -- indicated keyword for search feature
             auth (Optional) -- credentials for login interface
             headless (Optional) -- use headless firefox
             log_path (Optional)-- file path of selenium logging
-            wait_between (Optional) -- scraper timeout
+            wait_between (Optional) -- [min, max] seconds between page loads, their mean sets the starting rate
+                ([0, 0] starts unlimited)
+            rate_limit (Optional) -- adaptive per-host rate limiter settings: initial_rate, min_rate (default 0.05),
+                max_rate (default unbounded) in requests/s, increase, decrease, target_latency, block_markers
             disable_images (Optional) -- toggle True to enable faster scraping, might not work with specific sites
+            resource_blocking (Optional) -- request blocking settings: types ('image', 'font', 'stylesheet',
+                'media', 'plugin'), block_domains and allow_domains (host patterns), filter_proxy (route the
+                drivers through a local filtering proxy, default True)
             user_agent (Optional) -- toggles defined user agent for sending requests
             browser_time (Optional) -- sets defined requests duration
-            outfile (Optional) -- path to saved scraped contents
+            page_load_strategy (Optional) -- 'normal', 'eager' or 'none', when driver.get() returns
+            ready_xpaths (Optional) -- xpath keys that must be present before a detail page is extracted
+            ready_timeout (Optional) -- max seconds to wait for page readiness
+            outfile (Optional) -- path to saved scraped contents, format picked by extension (.csv, .parquet, .arrow, .db)
+                csv and sqlite add to an existing file, parquet and arrow write a new <stem>.<n> part file next to it
             file_headers (Optional) -- headers in csv file
+            flush_every (Optional) -- buffered rows written to outfile at once
+            flush_interval (Optional) -- max seconds a row stays buffered before it is written
+            output_format (Optional) -- 'csv', 'parquet', 'arrow' or 'sqlite', overrides the outfile extension
+            column_types (Optional) -- {header: 'int64' | 'float64' | 'string'} for typed columnar output
+            row_group_size (Optional) -- rows per row group/record batch in columnar output
+            normalize_batch_size (Optional) -- raw records converted together by the normalization stage
+            extraction_mode (Optional) -- 'webdriver' (one call per field), 'script' (single execute_script)
+                or 'lxml' (one DOM snapshot evaluated offline)
+            fetch_mode (Optional) -- 'browser' or 'http' (detail pages fetched with a pooled requests.Session)
+            required_fields (Optional) -- fields an http-fetched page must yield, else it is reloaded in the browser
+            http_pool_size (Optional) -- number of kept-alive connections in http fetch mode
+            async_crawl (Optional) -- fetch the detail pages of each results page concurrently (http fetch mode)
+            max_concurrency (Optional) -- global limit of concurrent detail-page fetches
+            max_per_host (Optional) -- limit of concurrent detail-page fetches per host
+            connection_delay (Optional) -- [min, max] seconds each host connection rests between fetches
+            workers (Optional) -- number of parallel browser workers consuming the detail links
+            grid_endpoints (Optional) -- [{url, capacity}] Selenium Grid endpoints the browsers are started on
+                instead of a local Firefox. workers defaults to their total capacity
+            grid_cooldown (Optional) -- seconds a failed grid node is left out
+            user_agents (Optional) -- user agents assigned round-robin to the browser workers
+            checkpoint_path (Optional) -- SQLite file the crawl state is persisted to as it runs
+            resume (Optional) -- continue the crawl saved in checkpoint_path instead of starting over
+            seen_index_path (Optional) -- SQLite index of scraped listings shared across runs
+            freshness_hours (Optional) -- listings scraped within this many hours are skipped
+            profile_cache (Optional) -- build each distinct browser profile once and reuse it, default True
+            profile_cache_dir (Optional) -- directory the prebuilt profiles are kept in across runs
+            driver (Optional) -- warm webdriver to borrow instead of starting one, it is not quit by quit_browser
+            http_fetcher (Optional) -- warm HttpFetcher to borrow, it is not closed by quit_browser
+            rate_limiter (Optional) -- AdaptiveRateLimiter shared with other scrapers of the same site
+            metrics (Optional) -- per-stage timing and counters: snapshot_path (JSON file written every
+                snapshot_interval seconds), port (local /metrics Prometheus and /stats JSON endpoint). off when unset
+            shared_metrics (Optional) -- started Metrics to report to instead of metrics, it is not closed by quit_browser
+            recycle (Optional) -- browser recycling settings: max_pages, max_minutes, max_rss_mb (memory of the
+                browser process tree), prewarm_at (fraction of a limit at which the replacement starts), check_every
+            archive_path (Optional) -- directory of a compressed archive every fetched detail page is recorded to
+            replay (Optional) -- re-run extraction over the pages in archive_path, no browser or network is used
 
         Returns
         -------
@@ -69,24 +138,159 @@ class Scraper(object):
         self.main_url = kwargs.get('main_url')
         self.xpath: dict = kwargs.get('xpath')
         self.proxy: str = kwargs.get('proxy', False)
+        self.proxy_pool_config: dict = kwargs.get('proxy_pool', None) or {}
         self.keyword: str = kwargs.get('keyword', None)
         self.auth: dict = kwargs.get('auth', None)
         self.headless: str = kwargs.get('headless', False)
         self.verbose: bool = kwargs.get('verbose', True)
         self.log_path: str = kwargs.get('log_path', None)
         self.wait_between: list = kwargs.get('wait_between', [3, 5])
+        self.rate_limit: dict = kwargs.get('rate_limit', None)
+        self.metrics_config: dict = kwargs.get('metrics', None)
+        # metrics lent by a job scheduler are shared by every scraper of the process and closed by their owner
+        self._owns_metrics = kwargs.get('shared_metrics') is None
+        self.metrics = kwargs.get('shared_metrics') or (
+            Metrics(**self.metrics_config).start() if self.metrics_config is not None else NULL_METRICS
+        )
+        self.rate_limiter: AdaptiveRateLimiter = (
+            kwargs.get('rate_limiter') or AdaptiveRateLimiter.from_config(self.rate_limit, self.wait_between)
+        )
         self.disable_images: bool = kwargs.get('disable_images', False)
+        self.resource_blocking: dict = kwargs.get('resource_blocking', None)
         self.user_agent: str = kwargs.get('user_agent', None)
         self.browser_timeout: int = kwargs.get('browser_timeout', None)
-        self.options = Options()
+        self.page_load_strategy: str = kwargs.get('page_load_strategy', 'normal')
+        self.ready_timeout: float = kwargs.get('ready_timeout', 10)
+        self.ready_xpaths: list = [
+            self.xpath[key] for key in kwargs.get('ready_xpaths', ['address_full_address_xpath']) if key in self.xpath
+        ]
+        self.extraction_mode: str = kwargs.get('extraction_mode', 'webdriver')
+        self.compiled_xpaths: dict = compile_xpaths(content_xpaths(self.xpath))
+        self.fetch_mode: str = kwargs.get('fetch_mode', 'browser')
+        self.required_fields: list = kwargs.get('required_fields', ['address_full_address'])
+        self.http_pool_size: int = kwargs.get('http_pool_size', 10)
+        self.async_crawl: bool = kwargs.get('async_crawl', False)
+        self.max_concurrency: int = kwargs.get('max_concurrency', 16)
+        self.max_per_host: int = kwargs.get('max_per_host', 4)
+        self.connection_delay: list = kwargs.get('connection_delay', [0, 1])
+        self.grid_endpoints: list = kwargs.get('grid_endpoints', None)
+        self.grid: Grid = None
+        if self.grid_endpoints:
+            self.grid = Grid(self.grid_endpoints, cooldown=kwargs.get('grid_cooldown', 60))
+        # on a grid the main (results page) browser takes one slot, the workers the others
+        default_workers = max(self.grid.capacity - 1, 1) if self.grid is not None else 1
+        self.workers: int = int(kwargs.get('workers', default_workers))
+        self.user_agents: list = kwargs.get('user_agents', None)
+        self.checkpoint_path: str = kwargs.get('checkpoint_path', None)
+        self.resume: bool = kwargs.get('resume', False)
+        self.seen_index_path: str = kwargs.get('seen_index_path', None)
+        self.freshness_hours: float = kwargs.get('freshness_hours', 24)
+        self.recycle: dict = kwargs.get('recycle', None)
+        self.archive_path: str = kwargs.get('archive_path', None)
+        self.replay: bool = kwargs.get('replay', False)
+        if self.replay and self.archive_path is None:
+            raise ValueError("replay needs an archive_path to read the pages from")
+        self.archive: PageArchive = None
+        if self.archive_path is not None:
+            self.archive = PageArchive(self.archive_path)
+        self.profile_cache: ProfileCache = None
+        # a borrowed driver was launched by its owner, whose profile cache covers its replacements too
+        if kwargs.get('profile_cache', True) and kwargs.get('driver') is None and not self.replay:
+            from util.profiles import ProfileCache
+            self.profile_cache = ProfileCache(kwargs.get('profile_cache_dir', None))
 
         # attributes for storing to csv file
         # self.store: bool = kwargs.get('store', False)
         self.outfile: str = kwargs.get('outfile', None)
         self.file_headers: list = kwargs.get('file_headers', None)
+        self.flush_every: int = kwargs.get('flush_every', 50)
+        self.flush_interval: float = kwargs.get('flush_interval', 5.0)
+        self.output_format: str = kwargs.get('output_format', None)
+        self.column_types: dict = kwargs.get('column_types', None)
+        self.row_group_size: int = kwargs.get('row_group_size', 10000)
+        self.normalize_batch_size: int = kwargs.get('normalize_batch_size', 25)
+
+        self.writer = None
+        if self.outfile is not None:
+            self.writer = open_sink(
+                outfile=self.outfile,
+                headers=self.file_headers,
+                output_format=self.output_format,
+                column_types=self.column_types,
+                flush_every=self.flush_every,
+                flush_interval=self.flush_interval,
+                row_group_size=self.row_group_size
+            )
 
-        self.driver: webdriver = self._initialize_webdriver()
-        self.options = Options()
+        # a replay makes no requests, the proxy list is not even fetched
+        self.proxy_pool: ProxyPool = None
+        if self.proxy is True and not self.replay:
+            size = self.proxy_pool_config.get('size', 10)
+            self.proxy_pool = ProxyPool(
+                source=lambda: get_proxies(limit=size),
+                cache_path=self.proxy_pool_config.get('cache_path', 'proxy_cache.json'),
+                ttl=self.proxy_pool_config.get('ttl_hours', 1) * 3600,
+                failure_threshold=self.proxy_pool_config.get('failure_threshold', 3),
+                cooldown=self.proxy_pool_config.get('cooldown', 300)
+            )
+            if self.proxy_pool_config.get('probe_url'):
+                self.proxy_pool.probe(self.proxy_pool_config['probe_url'])
+        self.rotate_proxy_per_request: bool = (
+            self.proxy_pool is not None and self.proxy_pool_config.get('rotate', 'browser') == 'request'
+        )
+        self._filter_proxies: List[FilteringProxy] = []
+        self.transfer_totals: Dict[str, int] = {
+            'blocked_requests': 0,
+            'bytes_transferred': 0
+        }
+        self._closed = False
+        self._detail_handle: str = None
+        self._raw_batch: list = []
+        self._batch_lock = threading.RLock()
+
+        # a replay does not crawl, it leaves the crawl checkpoint and the seen index as they are
+        self.checkpoint: CrawlCheckpoint = None
+        if self.checkpoint_path is not None and not self.replay:
+            self.checkpoint = CrawlCheckpoint(self.checkpoint_path)
+
+        self.seen_index: SeenIndex = None
+        if self.seen_index_path is not None and not self.replay:
+            self.seen_index = SeenIndex(self.seen_index_path)
+
+        if self.headless is True and not self.replay:
+            log.info("Setting headless config...")
+
+        self.recycler: BrowserRecycler = None
+        if self.recycle and not self.replay:
+            self.recycler = BrowserRecycler(factory=self._replace_webdriver, **self.recycle)
+
+        # borrowed driver/http fetcher belong to a longer-lived owner, e.g. a job scheduler session.
+        # replaying only reads the archive, so no browser is started
+        self._owns_driver = kwargs.get('driver') is None and not self.replay
+        self.driver: webdriver = None
+        if not self.replay:
+            self.driver = kwargs.get('driver') or self._new_webdriver()
+
+        self.http_fetcher: HttpFetcher = kwargs.get('http_fetcher', None)
+        self._owns_http_fetcher = self.http_fetcher is None
+        self.crawler: AsyncCrawler = None
+        if self.fetch_mode == 'http' and self.http_fetcher is None and not self.replay:
+            from util.http_fetch import HttpFetcher
+            self.http_fetcher = HttpFetcher(
+                user_agent=self.user_agent,
+                timeout=self.browser_timeout or 30,
+                proxy_pool=self.proxy_pool,
+                pool_size=max(self.http_pool_size, self.max_concurrency) if self.async_crawl else self.http_pool_size
+            )
+        if self.fetch_mode == 'http' and self.async_crawl and not self.replay:
+            from util.crawler import AsyncCrawler
+            self.crawler = AsyncCrawler(
+                fetch=self._get_content_http,
+                on_record=self._complete,
+                max_concurrency=self.max_concurrency,
+                max_per_host=self.max_per_host,
+                connection_delay=self.connection_delay
+            )
 
         self.paging_task_links = []
         self.scraped_data = []
@@ -95,158 +299,267 @@ class Scraper(object):
 
         log.info(f"Initializing scraper with config: {self.__dict__}")
 
+        self.pool: BrowserPool = None
+        if (self.workers > 1 or self.grid is not None) and not self.replay:
+            self.pool = BrowserPool(
+                driver_factory=self._initialize_worker_webdriver,
+                work=self._pool_work,
+                workers=self.workers,
+                recycle=self.recycler.maybe_recycle if self.recycler is not None else None
+            )
+            self.pool.start()
+
+    def _initialize_webdriver(self,
+                              user_agent: str = None,
+                              proxy_address: str = None,
+                              filter_proxy: FilteringProxy = None,
+                              command_executor: str = None) -> webdriver:
+        # every driver gets its own profile, proxy and user agent. profiles are prebuilt once per
+        # distinct preferences/user agent when the profile cache is on.
+        # proxy_address/filter_proxy are passed to keep those of a recycled driver.
+        # command_executor starts the browser on that Selenium Grid endpoint instead of locally
+        from selenium import webdriver
+        from selenium.webdriver.common.proxy import Proxy, ProxyType
+        from selenium.webdriver.common.desired_capabilities import DesiredCapabilities
+        from selenium.webdriver.firefox.options import Options
+        from util.filter_proxy import (FilteringProxy, RESOURCE_PREFS)
+
+        user_agent = user_agent or self.user_agent
+
+        blocking = self.resource_blocking or {}
+        block_types = list(blocking.get('types', []))
+        if self.disable_images is True and 'image' not in block_types:
+            block_types += ['image', 'plugin']
+        preferences = {}
+        for resource in block_types:
+            preferences.update(RESOURCE_PREFS.get(resource, {}))
+        if block_types:
+            log.info(f"Blocking resource types {block_types}..")
+
+        if self.profile_cache is not None:
+            firefox_profile = self.profile_cache.get(preferences, user_agent=user_agent)
+        else:
+            firefox_profile = webdriver.FirefoxProfile()
+            if user_agent is not None:
+                firefox_profile.set_preference('general.useragent.override', user_agent)
+            for key, value in preferences.items():
+                firefox_profile.set_preference(key, value)
+
+        proxy_ip = proxy_address
+        if proxy_ip is None and self.proxy_pool is not None:
+            proxy_ip = self.proxy_pool.choose()
+        if proxy_ip is not None:
+            log.info(f"Using proxy address {proxy_ip}")
+        else:
+            log.info("Not using any proxy...")
+        proxy_address = proxy_ip
+
+        # the filtering proxy sits in front of the chosen proxy, one per driver so its stats are per page.
+        # rotating per request also goes through it, as firefox keeps its proxy for the whole session
+        use_filter_proxy = self.resource_blocking is not None and blocking.get('filter_proxy', True)
+        if command_executor is not None and (use_filter_proxy or self.rotate_proxy_per_request):
+            # it listens on this machine's loopback, which a grid node cannot reach
+            log.info("Filtering proxy is not used by grid browsers..")
+        elif filter_proxy is None and (use_filter_proxy or self.rotate_proxy_per_request):
+            filter_proxy = FilteringProxy(
+                block_types=block_types if use_filter_proxy else None,
+                block_domains=blocking.get('block_domains') if use_filter_proxy else [],
+                allow_domains=blocking.get('allow_domains'),
+                upstream=proxy_ip
+            ).start()
+            self._filter_proxies.append(filter_proxy)
+        if filter_proxy is not None:
+            proxy_ip = filter_proxy.address
+
+        proxy = None
+        if proxy_ip is not None:
+            proxy = Proxy({
+                'proxyType': ProxyType.MANUAL,
+                'httpProxy': proxy_ip,
+                'ftpProxy': proxy_ip,
+                'sslProxy': proxy_ip,
+                'noProxy': ''
+            })
+
+        # webdriver.Firefox stores the profile on its options, so concurrent launches must not share them
+        options = Options()
         if self.headless is True:
-            self.options.add_argument("--headless")
-            log.info("Setting headless config...")
-
-    def _initialize_webdriver(self) -> webdriver:
-        firefox_profile = webdriver.FirefoxProfile()
-        if self.disable_images is True:
-            if self.user_agent is not None:
-                firefox_profile.set_preference('general.useragent.override', self.user_agent)
-            firefox_profile.set_preference('permissions.default.image', 2)
-            firefox_profile.set_preference('dom.ipc.plugins.enabled.libflashplayer.so', 'false')
-            log.info('Image loading disabled..')
-
-            if self.proxy is True:
-                proxy_ip = random.choice(get_proxies())
-                self.proxy = Proxy({
-                    'proxyType': ProxyType.MANUAL,
-                    'httpProxy': proxy_ip,
-                    'ftpProxy': proxy_ip,
-                    'sslProxy': proxy_ip,
-                    'noProxy': ''
-                })
-                log.info(f"Using proxy address {proxy_ip}")
-                time.sleep(2)
-            else:
-                self.proxy = None
-                log.info("Not using any proxy...")
-                time.sleep(2)
-
-            web_driver = webdriver.Firefox(
-                firefox_options=self.options,
-                firefox_profile=firefox_profile,
-                log_path=None if self.log_path is None else self.log_path,
-                proxy=self.proxy
+            options.add_argument("--headless")
+
+        # 'eager'/'none' return from get() before subresources finish, readiness comes from wait_for_xpaths
+        capabilities = DesiredCapabilities.FIREFOX.copy()
+        capabilities['pageLoadStrategy'] = self.page_load_strategy
+        # webdriver.Firefox drops its proxy argument under marionette, only the capability reaches geckodriver
+        if proxy is not None:
+            proxy.add_to_capabilities(capabilities)
+
+        if command_executor is not None:
+            capabilities.update(options.to_capabilities())
+            web_driver = webdriver.Remote(
+                command_executor=command_executor,
+                desired_capabilities=capabilities,
+                browser_profile=firefox_profile
             )
-
-            if self.browser_timeout is not None:
-                web_driver.set_page_load_timeout(self.browser_timeout)
-                web_driver.set_script_timeout(self.browser_timeout)
-
-            return web_driver
-
         else:
-            if self.user_agent is not None:
-                firefox_profile.set_preference("general.useragent.override", self.user_agent)
-
-            if self.proxy is True:
-                proxy_ip = random.choice(get_proxies())
-                self.proxy = Proxy({
-                    'proxyType': ProxyType.MANUAL,
-                    'httpProxy': proxy_ip,
-                    'ftpProxy': proxy_ip,
-                    'sslProxy': proxy_ip,
-                    'noProxy': ''
-                })
-                log.info(f"Using proxy address {proxy_ip}")
-                time.sleep(2)
-            else:
-                self.proxy = None
-                log.info("Not using any proxy...")
-                time.sleep(2)
-
             web_driver = webdriver.Firefox(
-                firefox_options=self.options,
+                capabilities=capabilities,
+                firefox_options=options,
                 firefox_profile=firefox_profile,
-                log_path=None if self.log_path is None else self.log_path,
-                proxy=self.proxy
+                log_path=None if self.log_path is None else self.log_path
             )
-            if self.browser_timeout is not None:
-                web_driver.set_page_load_timeout(self.browser_timeout)
-                web_driver.set_script_timeout(self.browser_timeout)
-
-            return web_driver
-
-
-    def wait_for_page_to_load(self, timeout=10):
+        web_driver.command_executor_url = command_executor
+        web_driver.filter_proxy = filter_proxy if command_executor is None else None
+        web_driver.proxy_address = proxy_address
+        web_driver.user_agent = user_agent
+
+        if self.browser_timeout is not None:
+            web_driver.set_page_load_timeout(self.browser_timeout)
+            web_driver.set_script_timeout(self.browser_timeout)
+
+        return web_driver
+
+    # Replacement of a recycled driver, same proxy and user agent, cookies restored at url.
+    # runs in the recycler's pre-warm thread while the old driver keeps working
+    def _replace_webdriver(self, old: webdriver, cookies: List[dict], url: str) -> webdriver:
+        driver = self._initialize_webdriver(
+            user_agent=old.user_agent,
+            proxy_address=old.proxy_address,
+            filter_proxy=old.filter_proxy,
+            command_executor=old.command_executor_url
+        )
+        # the replacement takes over the old browser's grid slot
+        if getattr(old, 'grid_node', None) is not None:
+            driver.grid_node = old.grid_node
+        driver.logged_in = getattr(old, 'logged_in', False)
+        # cookies can only be added for the domain of the current page
+        driver.get(url)
+        for cookie in cookies:
+            try:
+                driver.add_cookie(cookie)
+            except WebDriverException as e:
+                log.debug(f"Could not restore cookie {cookie.get('name')}. Error: {e}")
+        driver.refresh()
+        return driver
+
+    # Recycle the main driver between two results pages, it resumes at the current results page
+    def _recycle_main_driver(self) -> None:
+        driver = self.recycler.maybe_recycle(self.driver)
+        if driver is not self.driver:
+            self.driver = driver
+            self._detail_handle = None
+            self.wait_for_page_to_load()
+
+    # Local browser, or one on the least loaded grid node that is up
+    def _new_webdriver(self, user_agent: str = None) -> webdriver:
+        if self.grid is None:
+            return self._initialize_webdriver(user_agent=user_agent)
+        return self.grid.start_driver(
+            lambda url: self._initialize_webdriver(user_agent=user_agent, command_executor=url)
+        )
+
+    # Driver factory for pool workers, rotating through the configured user agents
+    def _initialize_worker_webdriver(self, index: int) -> webdriver:
+        user_agent = self.user_agents[index % len(self.user_agents)] if self.user_agents else None
+        return self._new_webdriver(user_agent=user_agent)
+
+    @staticmethod
+    def _driver_alive(driver: webdriver) -> bool:
         try:
-            element_present = EC.presence_of_element_located((By.ID, 'main'))
-            WebDriverWait(self.driver, timeout).until(element_present)
-        except TimeoutException:
-            log.error("Timed out waiting for page to load")
-        finally:
+            driver.current_url
+            return True
+        except Exception:
+            return False
+
+    # Wait for the results page content (link_xpath) instead of a fixed sleep
+    def wait_for_page_to_load(self, timeout=None):
+        with self.metrics.timer('ready_wait'):
+            loaded = wait_for_xpaths(self.driver, [self.xpath['link_xpath']], timeout or self.ready_timeout)
+        if loaded:
             log.info("Page loaded")
+        else:
+            log.error("Timed out waiting for page to load")
+
+    # Wait for the config-declared detail page selectors
+    def _wait_for_content(self, driver: webdriver) -> None:
+        with self.metrics.timer('ready_wait'):
+            ready = wait_for_xpaths(driver, self.ready_xpaths, self.ready_timeout)
+        if not ready:
+            log.warning(f"Timed out waiting for content of {driver.current_url}, extracting anyway..")
+
+    # Wait for an xpath of the current page, used instead of the fixed sleeps around login and search
+    def _wait_for_xpath(self, key: str) -> None:
+        if not wait_for_xpaths(self.driver, [self.xpath[key]], self.ready_timeout):
+            log.warning(f"Timed out waiting for {key}")
 
     def quit_browser(self):
-        self.driver.quit()
+        if self._closed:
+            return
+        self._closed = True
+
+        if self.pool is not None:
+            self.pool.close()
+        if self.recycler is not None:
+            self.recycler.close()
+        if self.crawler is not None:
+            self.crawler.close()
+        if self.http_fetcher is not None and self._owns_http_fetcher:
+            self.http_fetcher.close()
+        self._flush_batch()
+        if self.checkpoint is not None:
+            self.checkpoint.close()
+        if self.seen_index is not None:
+            self.seen_index.close()
+        if self.writer is not None:
+            self.writer.close()
+        if self.archive is not None:
+            self.archive.close()
+        if self._owns_driver:
+            self.driver.quit()
+        elif self.driver is not None:
+            self._release_driver()
+        # every browser is quit, none of them still reads a cached profile
+        if self.profile_cache is not None:
+            self.profile_cache.close()
+        for filter_proxy in self._filter_proxies:
+            filter_proxy.close()
+        if self.proxy_pool is not None:
+            log.info(f"Proxy health: {self.proxy_pool.stats()}")
+        if self._filter_proxies:
+            log.info(f"Request blocking totals: {self.transfer_totals} (requests blocked by the filtering proxy)")
+        if self._owns_metrics:
+            self.metrics.close()
+
+    # Leave a borrowed driver as it was lent: detail window closed, results window focused
+    def _release_driver(self) -> None:
+        try:
+            if self._detail_handle in self.driver.window_handles:
+                self.driver.switch_to.window(self._detail_handle)
+                self.driver.close()
+            self.driver.switch_to.window(self.driver.window_handles[0])
+        except WebDriverException as e:
+            log.warning(f"Error releasing borrowed browser. Error: {e}")
 
     # First pagination. Only pass-on argument is login_url or main_url
     def paging_task(self) -> list:
-        current_url = ""
+        if self.replay:
+            return self.replay_archive()
         try:
-            if self.login_url is not None:
-                self.driver.get(self.login_url)
-                time.sleep(2)
-                self.driver.find_element_by_xpath(
-                    self.xpath['uname_input_xpath']
-                ).send_keys(self.auth.split(':')[0])
-
-                self.driver.find_element_by_xpath(
-                    self.xpath['pword_input_xpath']
-                ).send_keys(self.auth.split(':')[1])
-                time.sleep(2)
-
-                self.driver.find_element_by_xpath(
-                    self.xpath['submit_xpath']
-                ).click()
-
-                if self.main_url is not None:
-                    self.driver.get(self.main_url)
-                    current_url = self.driver.current_url
-                else:
-                    pass
-            else:
-                self.driver.get(self.main_url)
-                time.sleep(2)
-                if self.keyword is not None:
-                    self.driver.find_element_by_xpath(
-                        self.xpath['search_xpath']
-                    ).send_keys(self.keyword)
-                    time.sleep(2)
-                self.driver.find_element_by_xpath(
-                    self.xpath['search_submit_xpath']
-                ).click()
-                self.wait_for_page_to_load()
-
-                current_url = self.driver.current_url
-
-            # For Pagination
-
-            for i in range(int(self.max_num_of_pages)):
-                url_list = [
-                    url.get_attribute('href') for url in self.driver.find_elements_by_xpath(
-                        self.xpath['link_xpath']
-                    )
-                ]
-                for url in url_list:
-                    self.get_content(link=url)
-                    # log.info("Navigating back...")
-                    # self.driver.back()
-                    # self.paging_task_links.append(url_list)
-
-                self.driver.get(current_url)
-                try:
-                    self.driver.find_element_by_xpath(self.xpath['next_xpath']).click()
-                    a, b = self.wait_between
-                    wait_between = random.randint(a, b)
-                    log.info(f"Waiting {wait_between} seconds in between loads..")
-                    time.sleep(wait_between)
-                    current_url = self.driver.current_url
-                except NoSuchElementException or ElementNotInteractableException as ee:
-                    log.info('No next page found. End of pagination..')
-                    break
+            start_page = self._resume_or_start()
+
+            # Pagination only produces links, detail pages are handled as a separate stage
+            for page, url_list in self.iter_result_links(start_page):
+                self.metrics.inc('results_pages')
+                self.paging_task_links.extend(url_list)
+                if self.checkpoint is not None:
+                    self.checkpoint.save_page(page, self.driver.current_url, url_list)
+                    finished = self.checkpoint.completed(url_list)
+                    url_list = [url for url in url_list if url not in finished]
+                self.process_links(self._skip_fresh(url_list))
+                if self.recycler is not None and self._owns_driver:
+                    self._recycle_main_driver()
+
+            if self.pool is not None:
+                self.pool.join()
 
             return self.paging_task_links
 
@@ -255,141 +568,373 @@ class Scraper(object):
             log.info('Quitting Browser session..')
             self.quit_browser()
 
-    # Extract content from final page
-    def get_content(self, link: str) -> None:
-        data = {}
-
-        try:
-            self.driver.get(link)
-
-            data['address_url'] = self.driver.current_url
-
+    # Re-run extraction and normalization over the latest archived page of every listing
+    def replay_archive(self) -> list:
+        log.info(f"Replaying {len(self.archive)} archived pages from {self.archive_path}..")
+        for link, final_url, fetched_at, page in self.archive.iter_latest():
+            if self._closed:
+                break
+            self.metrics.inc('detail_pages')
+            data = {'address_url': final_url}
             try:
-                extracted_price = self.driver.find_element_by_xpath(
-                    self.xpath['address_listing_price_xpath']
-                ).text
-                cleaned_price = convert_str_to_number(extracted_price)
-                if len(cleaned_price) != 0:
-                    if max(cleaned_price) < 10000:
-                        data['address_listing_price_high'] = extracted_price
-                    else:
-                        if len(cleaned_price) > 1:
-                            data['address_listing_price_high'] = max(cleaned_price)
-                            data['address_listing_price_low'] = min(cleaned_price) if min(cleaned_price) > 10000 else None
-                        else:
-                            data['address_listing_price_high'] = int(''.join([str(x) for x in cleaned_price]))
-                            data['address_listing_price_low'] = None
-                else:
-                    data['address_listing_price_high'] = extracted_price
-            except NoSuchElementException as e:
-                data['address_listing_price_high'] = data['address_listing_price_low'] = None
+                with self.metrics.timer('extract'):
+                    data.update(extract_from_html(page, self.compiled_xpaths))
+            except (ParserError, XMLSyntaxError) as e:
+                log.warning(f"Skipping unparsable archived page of {link}. Error: {e}")
+                self.metrics.inc('errors')
+                continue
+            self.paging_task_links.append(link)
+            self._complete(link, data)
+        return self.paging_task_links
+
+    # Drop the listings scraped within freshness_hours, they are marked done so a resume skips them too
+    def _skip_fresh(self, url_list: List[str]) -> List[str]:
+        if self.seen_index is None:
+            return url_list
+        fresh = self.seen_index.fresh(url_list, self.freshness_hours * 3600)
+        if fresh:
+            log.info(f"Skipping {len(fresh)} listings scraped within the last {self.freshness_hours} hours..")
+            for url in fresh:
+                self._mark(url, DONE)
+        return [url for url in url_list if url not in fresh]
+
+    # Reopen the checkpointed results page when resuming, else start a fresh search. Returns the page index
+    def _resume_or_start(self) -> int:
+        state = self.checkpoint.state() if self.checkpoint is not None and self.resume else None
+        if state is not None and self.checkpoint.meta().get('keyword') != self.keyword:
+            log.warning(f"Checkpoint was started for keyword {self.checkpoint.meta().get('keyword')}. Starting over..")
+            state = None
+
+        if state is None:
+            if self.checkpoint is not None:
+                self.checkpoint.reset(keyword=self.keyword, main_url=self.main_url)
+            self._open_search_results()
+            return 0
+
+        log.info(f"Resuming crawl at results page {state['page'] + 1}: {state['results_url']}")
+        # the results pages of a login-only site need the session of a new login
+        if self.login_url is not None:
+            self._log_in()
+        self.driver.get(state['results_url'])
+        self.wait_for_page_to_load()
+
+        unfinished = self._skip_fresh(self.checkpoint.unfinished(before_page=state['page']))
+        if unfinished:
+            log.info(f"Retrying {len(unfinished)} unfinished listings from earlier pages..")
+            self.process_links(unfinished)
+
+        return state['page']
+
+    # Log in at login_url. a browser borrowed from a job scheduler session is already logged in by an earlier job
+    def _log_in(self) -> None:
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support.expected_conditions import staleness_of
+
+        if getattr(self.driver, 'logged_in', False):
+            return
+        self.driver.get(self.login_url)
+        self._wait_for_xpath('uname_input_xpath')
+        self.driver.find_element_by_xpath(
+            self.xpath['uname_input_xpath']
+        ).send_keys(self.auth.split(':')[0])
+
+        self.driver.find_element_by_xpath(
+            self.xpath['pword_input_xpath']
+        ).send_keys(self.auth.split(':')[1])
+
+        submit = self.driver.find_element_by_xpath(
+            self.xpath['submit_xpath']
+        )
+        submit.click()
+        try:
+            WebDriverWait(self.driver, self.ready_timeout, poll_frequency=0.1).until(staleness_of(submit))
+        except TimeoutException:
+            log.warning("Timed out waiting for login to submit")
+        else:
+            self.driver.logged_in = True
 
-            try:
-                data['address_bedrooms'] = int(
-                    re.sub(
-                        r'"', '', self.driver.find_element_by_xpath(self.xpath['address_bedrooms_xpath']).text
+    # Login and/or search, leaves the driver on the first results page
+    def _open_search_results(self) -> None:
+        if self.login_url is not None:
+            self._log_in()
+            if self.main_url is not None:
+                self.driver.get(self.main_url)
+        else:
+            self.driver.get(self.main_url)
+            self._wait_for_xpath('search_submit_xpath')
+            if self.keyword is not None:
+                self.driver.find_element_by_xpath(
+                    self.xpath['search_xpath']
+                ).send_keys(self.keyword)
+            self.driver.find_element_by_xpath(
+                self.xpath['search_submit_xpath']
+            ).click()
+            self.wait_for_page_to_load()
+
+    # Link producer: yields (page index, detail links) of every results page without leaving the results window
+    def iter_result_links(self, page: int = 0):
+        while True:
+            yield page, [
+                url.get_attribute('href') for url in self.driver.find_elements_by_xpath(
+                    self.xpath['link_xpath']
                 )
-            )
-            except NoSuchElementException as e:
-                data['address_bedrooms'] = None
+            ]
 
-            try:
-                data['address_bathrooms'] = int(
-                    re.sub(
-                        r'"', '', self.driver.find_element_by_xpath(self.xpath['address_bathrooms_xpath']).text
-                )
-            )
-            except NoSuchElementException as e:
-                data['address_bathrooms'] = None
+            page += 1
+            if page >= int(self.max_num_of_pages) or self._closed:
+                break
 
-            try:
-                data['address_car_spaces'] = int(
-                    re.sub(
-                        r'"', '', self.driver.find_element_by_xpath(self.xpath['address_car_spaces_xpath']).text
-                )
-            )
-            except NoSuchElementException as e:
-                data['address_car_spaces'] = None
+            if not self._goto_next_page():
+                log.info('No next page found. End of pagination..')
+                break
 
-            try:
-                data['address_property_type'] = self.driver.find_element_by_xpath(
-                    self.xpath['address_property_type_xpath']
-                ).text
-            except NoSuchElementException as e:
-                data['address_property_type'] = None
+    # Navigate straight to the next-page href, clicking only when the link has none
+    def _goto_next_page(self) -> bool:
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support.expected_conditions import staleness_of
 
-            try:
-                data['address_description'] = self.driver.find_element_by_xpath(
-                    self.xpath['address_description_xpath']
-                ).text
-            except NoSuchElementException as e:
-                data['address_description'] = None
+        try:
+            next_link = self.driver.find_element_by_xpath(self.xpath['next_xpath'])
+            next_url = next_link.get_attribute('href')
+            if next_url:
+                self._browser_get(self.driver, next_url)
+            else:
+                self.metrics.observe('throttle', self.rate_limiter.acquire(urlparse(self.driver.current_url).netloc))
+                next_link.click()
+                try:
+                    WebDriverWait(self.driver, self.ready_timeout, poll_frequency=0.1).until(staleness_of(next_link))
+                except TimeoutException:
+                    log.warning("Timed out waiting for the next results page")
+            self.wait_for_page_to_load()
+            return True
+        except (NoSuchElementException, ElementNotInteractableException) as ee:
+            return False
+
+    # Detail stage: hands a page of links to the pool, the async crawler or the detail window
+    def process_links(self, url_list: List[str]) -> None:
+        if self.pool is not None:
+            for url in url_list:
+                self.pool.submit(url)
+        elif self.crawler is not None:
+            self.crawl_links(url_list)
+        else:
+            with self._detail_window():
+                for url in url_list:
+                    if self._closed:
+                        break
+                    self.get_content(link=url)
 
-            try:
-                data['address_full_address'] = self.driver.find_element_by_xpath(
-                    self.xpath['address_full_address_xpath']
-                ).text
-            except NoSuchElementException as e:
-                data['address_full_address'] = None
+    # Loads detail pages in a second window so the results page never has to be reloaded
+    @contextmanager
+    def _detail_window(self):
+        results_handle = self.driver.current_window_handle
+        if self._detail_handle not in self.driver.window_handles:
+            self.driver.execute_script("window.open('about:blank');")
+            self._detail_handle = [
+                handle for handle in self.driver.window_handles if handle != results_handle
+            ][-1]
+        self.driver.switch_to.window(self._detail_handle)
+        try:
+            yield
+        finally:
+            if not self._closed:
+                self.driver.switch_to.window(results_handle)
+
+    # Concurrently fetch all detail pages of a results page, failed ones are retried in the browser
+    def crawl_links(self, links: List[str]) -> None:
+        failed = self.crawler.crawl(links)
+        if not failed:
+            return
+        # the fallback must not navigate the results window away from its page
+        with self._detail_window():
+            for link in failed:
+                if self._closed:
+                    break
+                self.get_content(link=link, use_http=False)
 
-            try:
-                data['property_size'] = float(
-                    "".join(
-                        re.findall(
-                            r'[0-9]+', self.driver.find_element_by_xpath(self.xpath['property_size_xpath']).text
-                        )
-                    )
-                )
-            except NoSuchElementException as e:
-                data['property_size'] = None
+    # Extract content from final page
+    def get_content(self, link: str, use_http: bool = True) -> None:
+        try:
+            self._complete(link, self._fetch_record(link, self.driver, use_http))
 
-            try:
-                distances = self.driver.find_elements_by_xpath(
-                    self.xpath['property_distance_from_schools_aggregate_xpath']
-                )
-                dst_agg = list()
-                for distance in distances:
-                    dst = re.sub(r'km', '', distance.text)
-                    dst_agg.append(float(dst))
-                data['property_distance_from_schools_aggregate'] = round(sum(dst_agg), 2)
-            except NoSuchElementException as e:
-                data['property_distance_from_schools_aggregate'] = None
+        except TimeoutException as te:
+            log.info('Browser timeout. Quitting session..')
+            self.metrics.inc('errors')
+            self._mark(link, FAILED)
+            self.quit_browser()
 
-            try:
-                data['year_sold'] = dateparser.parse(
-                        re.sub(r'Sold on ', '', self.driver.find_element_by_xpath(self.xpath['date_xpath']).text)
-                    ).year
-            except NoSuchElementException as e:
-                data['year_sold'] = None
+    # Work function of the browser pool, runs in a worker thread with the worker's own driver
+    def _pool_work(self, driver: webdriver, link: str) -> None:
+        try:
+            self._complete(link, self._fetch_record(link, driver))
+        except TimeoutException as te:
+            log.error(f'Browser timeout loading {link}. Skipping..')
+            self.metrics.inc('errors')
+            self._mark(link, FAILED)
+        except Exception as e:
+            self.metrics.inc('errors')
+            if self._driver_alive(driver):
+                raise
+            # browser or grid node died, the pool hands the link to a new browser elsewhere
+            node = getattr(driver, 'grid_node', None)
+            if node is not None:
+                self.grid.release(node)
+                self.grid.mark_down(node)
+            self.metrics.inc('retries')
+            raise DriverLost(str(e))
+
+    def _fetch_record(self, link: str, driver: webdriver, use_http: bool = True) -> dict:
+        data = None
+        if self.fetch_mode == 'http' and use_http:
+            data = self._get_content_http(link)
+        if data is None:
+            if self.fetch_mode == 'http' and use_http:
+                self.metrics.inc('retries')
+            data = self._get_content_browser(link, driver)
+        return data
+
+    # Queue a raw extracted record for the batched normalization stage
+    def _complete(self, link: str, raw: dict) -> None:
+        with self._batch_lock:
+            self._raw_batch.append((link, raw))
+            if len(self._raw_batch) >= self.normalize_batch_size:
+                self._flush_batch()
+
+    def _flush_batch(self) -> None:
+        with self._batch_lock:
+            batch, self._raw_batch = self._raw_batch, []
+            with self.metrics.timer('normalize'):
+                records = normalize_records([raw for link, raw in batch])
+            for (link, raw), data in zip(batch, records):
+                self._store_record(data)
+                self._mark(link, DONE)
+                if self.seen_index is not None:
+                    self.seen_index.record([link, data.get('address_url')], data)
+
+    def _mark(self, link: str, status: str) -> None:
+        if self.checkpoint is not None:
+            self.checkpoint.mark(link, status)
+
+    def _store_record(self, data: dict) -> None:
+        log.info(json.dumps(
+            data,
+            sort_keys=True,
+            indent=4
+        ))
+
+        # self.scraped_data.append(data)
+
+        self.metrics.inc('listings')
+        if self.writer is not None:
+            with self.metrics.timer('write'):
+                self.writer.write(data)
+
+    # Rate-limited navigation, feeding latency and block pages back to the limiter and the proxy pool
+    def _browser_get(self, driver: webdriver, url: str) -> None:
+        host = urlparse(url).netloc
+        proxy_address = getattr(driver, 'proxy_address', None)
+        if self.rotate_proxy_per_request and driver.filter_proxy is not None:
+            proxy_address = driver.proxy_address = driver.filter_proxy.upstream = self.proxy_pool.choose()
+
+        self.metrics.observe('throttle', self.rate_limiter.acquire(host))
+        start = time.monotonic()
+        try:
+            driver.get(url)
+        except WebDriverException:
+            self.metrics.observe('fetch', time.monotonic() - start)
+            self.rate_limiter.record(host, latency=time.monotonic() - start, failed=True)
+            if proxy_address is not None:
+                self.proxy_pool.record(proxy_address, ok=False)
+            raise
+        latency = time.monotonic() - start
+        self.metrics.observe('fetch', latency)
+        if self.recycler is not None:
+            self.recycler.page_loaded(driver)
+        blocked = self.rate_limiter.is_block_page(driver.title)
+        self.rate_limiter.record(host, latency=latency, blocked=blocked)
+        if proxy_address is not None:
+            self.proxy_pool.record(proxy_address, latency, ok=not blocked)
+
+    # Blocked requests and bytes through the driver's filtering proxy since its previous report
+    def _report_transfer(self, driver: webdriver, link: str) -> None:
+        filter_proxy = getattr(driver, 'filter_proxy', None)
+        if filter_proxy is None:
+            return
+        stats = filter_proxy.take_stats()
+        with self._batch_lock:
+            for key, value in stats.items():
+                self.transfer_totals[key] += value
+        log.info(f"{link}: {stats['blocked_requests']} requests blocked, {stats['bytes_transferred']} bytes transferred")
+
+    def _get_content_browser(self, link: str, driver: webdriver) -> dict:
+        self._browser_get(driver, link)
+        self._wait_for_content(driver)
+
+        self.metrics.inc('detail_pages')
+        data = {'address_url': driver.current_url}
+
+        page = None
+        with self.metrics.timer('extract'):
+            if self.extraction_mode == 'lxml':
+                page = snapshot_html(driver)
+                raw = extract_from_html(page, self.compiled_xpaths)
+            elif self.extraction_mode == 'script':
+                raw = extract_with_script(driver, content_xpaths(self.xpath))
+            else:
+                raw = extract_with_webdriver(driver, content_xpaths(self.xpath))
+        data.update(raw)
+        if self.archive is not None:
+            self.archive.put(link, page if page is not None else snapshot_html(driver), final_url=data['address_url'])
+        self._report_transfer(driver, link)
 
+        return data
 
-            try:
-                data['month_sold'] = dateparser.parse(
-                        re.sub(r'Sold on ', '', self.driver.find_element_by_xpath(self.xpath['date_xpath']).text)
-                    ).month
-            except NoSuchElementException as e:
-                data['month_sold'] = None
-
-            log.info(json.dumps(
-                data,
-                sort_keys=True,
-                indent=4
-            ))
-
-            # self.scraped_data.append(data)
-
-            if self.outfile is not None:
-                store_to_csv(
-                    data=data,
-                    outfile=self.outfile,
-                    headers=self.file_headers
-                )
+    # Fetch and parse a detail page without the browser, None when it needs a browser fallback
+    def _get_content_http(self, link: str) -> dict:
+        import requests
 
-            a, b = self.wait_between
-            wait_between = random.randint(a, b)
-            log.info(f"Waiting {wait_between} seconds in between loads..")
-            time.sleep(wait_between)
+        host = urlparse(link).netloc
+        self.metrics.observe('throttle', self.rate_limiter.acquire(host))
+        start = time.monotonic()
+        try:
+            response = self.http_fetcher.fetch(link)
+        except requests.RequestException as e:
+            self.metrics.inc('errors')
+            self.metrics.observe('fetch', time.monotonic() - start)
+            self.rate_limiter.record(host, latency=time.monotonic() - start, failed=True)
+            log.warning(f"HTTP fetch failed for {link}: {e}. Falling back to browser..")
+            return None
+
+        self.metrics.observe('fetch', time.monotonic() - start)
+        self.metrics.inc('detail_pages')
+        retry_after = response.headers.get('Retry-After')
+        title = PAGE_TITLE.search(response.text)
+        self.rate_limiter.record(
+            host,
+            latency=time.monotonic() - start,
+            status=response.status_code,
+            blocked=self.rate_limiter.is_block_page(title.group(1) if title else ''),
+            retry_after=float(retry_after) if retry_after and retry_after.isdigit() else None
+        )
+
+        if response.status_code != 200:
+            log.warning(f"HTTP {response.status_code} for {link}. Falling back to browser..")
+            return None
 
-        except TimeoutException as te:
-            log.info('Browser timeout. Quitting session..')
-            self.quit_browser()
+        try:
+            with self.metrics.timer('extract'):
+                raw = extract_from_html(response.text, self.compiled_xpaths)
+        except (ParserError, XMLSyntaxError) as e:
+            log.warning(f"Unparsable HTTP response for {link}: {e}. Falling back to browser..")
+            return None
+        missing = [field for field in self.required_fields if not raw.get(field)]
+        if missing:
+            log.warning(f"Missing {missing} in HTTP response for {link}. Falling back to browser..")
+            return None
+
+        data = {'address_url': response.url}
+        data.update(raw)
+        if self.archive is not None:
+            self.archive.put(link, response.text, final_url=response.url)
+
+        return data
@@ -0,0 +1,143 @@
+from http.server import (BaseHTTPRequestHandler, ThreadingHTTPServer)
+from types import SimpleNamespace
+
+import threading
+import json
+import sys
+import os
+
+import pytest
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from selenium.common.exceptions import WebDriverException
+
+FIXTURES = os.path.join(ROOT, 'benchmarks', 'fixtures')
+
+
+class _PageHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.server.paths.append(self.path)
+        status, body = self.server.routes.get(self.path, (None, None))
+        if status is None:
+            path = os.path.join(FIXTURES, os.path.basename(self.path))
+            if not os.path.isfile(path):
+                self.send_error(404)
+                return
+            status, body = 200, open(path, 'rb').read()
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+# local site serving the saved pages of benchmarks/fixtures, plus routes set per test
+@pytest.fixture
+def page_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _PageHandler)
+    server.daemon_threads = True
+    server.paths = []
+    server.routes = {}
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class FakeDriver(object):
+    """Stand-in webdriver: get() fetches the page with requests, through the proxy in its capabilities."""
+
+    def __init__(self, capabilities: dict = None, **kwargs) -> None:
+        self.capabilities = capabilities or {}
+        self.kwargs = kwargs
+        self.current_url = None
+        self.title = ''
+        self.page_source = ''
+        self.window_handles = ['results']
+        self.switch_to = SimpleNamespace(window=lambda handle: None)
+        self.quit_called = False
+        self.cookies = []
+
+    @property
+    def proxy(self):
+        return self.capabilities.get('proxy', {}).get('httpProxy')
+
+    def get(self, url: str) -> None:
+        proxies = {'http': f"http://{self.proxy}", 'https': f"http://{self.proxy}"} if self.proxy else None
+        session = requests.Session()
+        session.trust_env = False
+        try:
+            response = session.get(url, proxies=proxies, timeout=5)
+        except requests.RequestException as e:
+            raise WebDriverException(str(e))
+        self.current_url = response.url
+        self.page_source = response.text
+        self.title = response.reason
+
+    def get_cookies(self):
+        return list(self.cookies)
+
+    def add_cookie(self, cookie: dict) -> None:
+        self.cookies = [c for c in self.cookies if c['name'] != cookie['name']] + [cookie]
+
+    def refresh(self) -> None:
+        self.get(self.current_url)
+
+    def set_page_load_timeout(self, timeout):
+        pass
+
+    def set_script_timeout(self, timeout):
+        pass
+
+    def quit(self):
+        self.quit_called = True
+
+
+@pytest.fixture
+def scraper_config():
+    with open(os.path.join(ROOT, 'config_files', 'realestateau.json'), encoding="utf8") as f:
+        config = json.load(f)['scraper_config']
+    config['wait_between'] = [0, 0]
+    return config
+
+
+# a driver-less Scraper: a FakeDriver is borrowed instead of starting firefox
+@pytest.fixture
+def make_scraper(scraper_config):
+    from scraper import Scraper
+
+    scrapers = []
+
+    def make(**overrides):
+        config = dict(scraper_config, **overrides)
+        config.setdefault('driver', FakeDriver())
+        scraper = Scraper(**config)
+        scrapers.append(scraper)
+        return scraper
+
+    yield make
+    for scraper in scrapers:
+        scraper.quit_browser()
+
+
+# firefox replaced by FakeDriver, capturing the capabilities each browser would be launched with
+@pytest.fixture
+def fake_firefox(monkeypatch):
+    from selenium import webdriver
+
+    launched = []
+
+    def firefox(capabilities=None, **kwargs):
+        driver = FakeDriver(capabilities, **kwargs)
+        launched.append(driver)
+        return driver
+
+    monkeypatch.setattr(webdriver, 'Firefox', firefox)
+    return launched
@@ -0,0 +1,23 @@
+import threading
+
+from util.archive import PageArchive
+
+
+def test_iter_latest_streams_without_blocking_puts(tmp_path):
+    archive = PageArchive(str(tmp_path / 'archive'), commit_every=1000)
+    for i in range(5):
+        archive.put(f"https://x/{i}", f"old {i}", fetched_at=1.0)
+        archive.put(f"https://x/{i}", f"page {i}", fetched_at=2.0)
+
+    replay = archive.iter_latest()
+    first = next(replay)
+    # the replay holds no lock, a put in between does not wait for it to finish
+    writer = threading.Thread(target=archive.put, args=('https://x/new', 'new page'))
+    writer.start()
+    writer.join(timeout=5)
+    assert not writer.is_alive()
+
+    pages = [first] + list(replay)
+    assert [(url, page) for url, _, _, page in pages] == [(f"https://x/{i}", f"page {i}") for i in range(5)]
+    assert archive.get('https://x/new') == 'new page'
+    archive.close()
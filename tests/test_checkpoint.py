@@ -0,0 +1,43 @@
+import pytest
+
+from util.checkpoint import (CrawlCheckpoint, DONE)
+
+
+@pytest.fixture
+def saved_crawl(tmp_path, page_server):
+    path = str(tmp_path / 'crawl.db')
+    checkpoint = CrawlCheckpoint(path)
+    checkpoint.reset(keyword=None)
+    checkpoint.save_page(0, f"{page_server.url}/buy_results.html", ['https://x/1', 'https://x/2'])
+    checkpoint.mark('https://x/1', DONE)
+    checkpoint.save_page(1, f"{page_server.url}/sold_results.html", ['https://x/3'])
+    checkpoint.close()
+    return path
+
+
+def _resumed(make_scraper, monkeypatch, **config):
+    scraper = make_scraper(resume=True, **config)
+    processed = []
+    monkeypatch.setattr(scraper, 'wait_for_page_to_load', lambda timeout=None: None)
+    monkeypatch.setattr(scraper, 'process_links', processed.extend)
+    return scraper, processed
+
+
+def test_resume_continues_at_the_saved_results_page(make_scraper, monkeypatch, page_server, saved_crawl):
+    scraper, processed = _resumed(make_scraper, monkeypatch, checkpoint_path=saved_crawl)
+
+    assert scraper._resume_or_start() == 1
+    assert scraper.driver.current_url == f"{page_server.url}/sold_results.html"
+    # unfinished listings of the pages before are retried, the saved page is crawled again by the caller
+    assert processed == ['https://x/2']
+
+
+def test_resume_logs_in_before_the_saved_results_page(make_scraper, monkeypatch, page_server, saved_crawl):
+    scraper, processed = _resumed(make_scraper, monkeypatch, checkpoint_path=saved_crawl,
+                                  login_url=f"{page_server.url}/login.html", auth='user:secret')
+    logins = []
+    monkeypatch.setattr(scraper, '_log_in', lambda: logins.append(scraper.driver.current_url))
+
+    assert scraper._resume_or_start() == 1
+    assert logins == [None]
+    assert scraper.driver.current_url == f"{page_server.url}/sold_results.html"
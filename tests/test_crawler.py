@@ -0,0 +1,56 @@
+from collections import Counter
+
+import threading
+import time
+
+from util.crawler import AsyncCrawler
+
+
+class ConcurrencyProbe(object):
+    """Blocking fetch recording the most fetches in flight, overall and per host."""
+
+    def __init__(self, fail: set = ()) -> None:
+        self.fail = fail
+        self._lock = threading.Lock()
+        self._in_flight = Counter()
+        self.peak = Counter()
+
+    def __call__(self, link: str):
+        host = link.split('/')[2]
+        with self._lock:
+            self._in_flight[host] += 1
+            self._in_flight['*'] += 1
+            for key in (host, '*'):
+                self.peak[key] = max(self.peak[key], self._in_flight[key])
+        time.sleep(0.05)
+        with self._lock:
+            self._in_flight[host] -= 1
+            self._in_flight['*'] -= 1
+        return None if link in self.fail else {'address_url': link}
+
+
+def test_global_and_per_host_limits_hold():
+    probe, records = ConcurrencyProbe(), []
+    crawler = AsyncCrawler(probe, lambda link, record: records.append(link), max_concurrency=5, max_per_host=2)
+    links = [f"https://host-{host}/listing/{i}" for host in range(4) for i in range(6)]
+    try:
+        assert crawler.crawl(links) == []
+    finally:
+        crawler.close()
+
+    assert sorted(records) == sorted(links)
+    # the limits are reached but never exceeded
+    assert 1 < probe.peak['*'] <= 5
+    assert all(probe.peak[f"host-{host}"] <= 2 for host in range(4))
+
+
+def test_single_host_is_held_to_its_connections():
+    probe = ConcurrencyProbe(fail={'https://host/listing/3'})
+    crawler = AsyncCrawler(probe, lambda link, record: None, max_concurrency=8, max_per_host=3)
+    try:
+        failed = crawler.crawl([f"https://host/listing/{i}" for i in range(12)])
+    finally:
+        crawler.close()
+
+    assert failed == ['https://host/listing/3']
+    assert 1 < probe.peak['host'] <= 3 and probe.peak['*'] <= 3
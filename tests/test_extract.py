@@ -0,0 +1,68 @@
+import json
+import os
+
+import pytest
+from lxml import html
+
+from conftest import (FIXTURES, ROOT)
+from util.extract import (compile_xpaths, content_xpaths, extract_from_html, node_text)
+
+DESCRIPTION = (
+    "Set on a generous block in a quiet tree-lined street, this renovated Edwardian offers four bedrooms, two "
+    "bathrooms and open-plan living that opens onto a north-facing garden. Walk to the station, Station Street "
+    "shops, parks and the Darebin Creek trail.\n\nFeatures include ducted heating, split-system cooling, a "
+    "butler's pantry, a home office and a double garage with rear lane access."
+)
+
+# the records webdriver and script extraction read from the fixtures in firefox (WebElement.text / innerText)
+BROWSER_RECORDS = {
+    'buy_listing.html': {
+        'address_listing_price': '$1,150,000 - $1,250,000',
+        'address_bedrooms': '4',
+        'address_bathrooms': '2',
+        'address_car_spaces': '2',
+        'address_property_type': 'House',
+        'address_description': DESCRIPTION,
+        'address_full_address': '12 Station Street, Fairfield, Vic 3078',
+        'property_size': '650m²',
+        'property_distance_from_schools_aggregate': ['0.4km', '1.9km', '850m', '2.6km'],
+        'date': None
+    },
+    'sold_listing.html': {
+        'address_listing_price': '$1,382,500',
+        'address_bedrooms': '4',
+        'address_bathrooms': '2',
+        'address_car_spaces': '2',
+        'address_property_type': 'House',
+        'address_description': DESCRIPTION,
+        'address_full_address': '7 Grange Road, Alphington, Vic 3078',
+        'property_size': '0.12 ha',
+        'property_distance_from_schools_aggregate': ['0.4km', '1.9km', '850m', '2.6km'],
+        'date': 'Sold on 12 Mar 2021'
+    }
+}
+
+
+@pytest.fixture(scope='module')
+def compiled():
+    with open(os.path.join(ROOT, 'config_files', 'realestateau.json'), encoding="utf8") as f:
+        return compile_xpaths(content_xpaths(json.load(f)['scraper_config']['xpath']))
+
+
+@pytest.mark.parametrize('fixture', sorted(BROWSER_RECORDS))
+def test_lxml_records_match_the_browser_records(compiled, fixture):
+    with open(os.path.join(FIXTURES, fixture), encoding="utf8") as f:
+        assert extract_from_html(f.read(), compiled) == BROWSER_RECORDS[fixture]
+
+
+@pytest.mark.parametrize('markup, text', [
+    ('<span>soft\n    wrapped   text</span>', 'soft wrapped text'),
+    ('<span>one<br>two<br><br>four</span>', 'one\ntwo\n\nfour'),
+    ('<div>head<p>para</p><p>graph</p>tail</div>', 'head\npara\ngraph\ntail'),
+    ('<div><b>bold</b> <i>italic</i><script>skip()</script></div>', 'bold italic'),
+    # preformatted line breaks are kept, every line is trimmed like selenium does
+    ('<pre>keep\n  this</pre>', 'keep\nthis'),
+    ('<span>non&nbsp;breaking</span>', 'non breaking')
+])
+def test_node_text_renders_like_webelement_text(markup, text):
+    assert node_text(html.fragment_fromstring(markup)) == text
@@ -0,0 +1,46 @@
+import requests
+
+from util.filter_proxy import FilteringProxy
+
+
+def _get(url: str, proxy: str) -> requests.Response:
+    session = requests.Session()
+    session.trust_env = False
+    return session.get(url, proxies={'http': f"http://{proxy}"}, timeout=5)
+
+
+def test_browser_is_launched_behind_the_filtering_proxy(make_scraper, fake_firefox, page_server):
+    scraper = make_scraper(resource_blocking={'types': ['font'], 'filter_proxy': True})
+    driver = scraper._initialize_webdriver()
+
+    assert driver.proxy == driver.filter_proxy.address
+    assert driver.capabilities['proxy']['sslProxy'] == driver.filter_proxy.address
+
+    driver.get(f"{page_server.url}/buy_listing.html")
+    assert page_server.paths == ['/buy_listing.html']
+    assert '<h1' in driver.page_source
+    assert driver.filter_proxy.take_stats()['bytes_transferred'] > len(driver.page_source)
+
+
+def test_blocked_domains_and_types_never_reach_the_network(page_server):
+    proxy = FilteringProxy(block_types=['font']).start()
+    try:
+        assert _get(f"{page_server.url}/buy_listing.html", proxy.address).status_code == 200
+        assert _get(f"{page_server.url}/site.woff2", proxy.address).status_code == 403
+        assert _get("http://stats.g.doubleclick.net/collect", proxy.address).status_code == 403
+        assert page_server.paths == ['/buy_listing.html']
+        stats = proxy.take_stats()
+        # blocked requests are counted, not priced in bytes they never transferred
+        assert set(stats) == {'blocked_requests', 'bytes_transferred'}
+        assert stats['blocked_requests'] == 2
+    finally:
+        proxy.close()
+
+
+def test_allow_domains_only_lets_listed_hosts_through(page_server):
+    proxy = FilteringProxy(block_domains=[], allow_domains=['localhost']).start()
+    try:
+        assert _get(f"{page_server.url}/buy_listing.html", proxy.address).status_code == 403
+        assert page_server.paths == []
+    finally:
+        proxy.close()
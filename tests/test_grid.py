@@ -0,0 +1,113 @@
+import time
+
+import pytest
+from selenium.common.exceptions import WebDriverException
+
+from conftest import FakeDriver
+from util.grid import Grid
+
+NODES = ['http://grid-a:4444/wd/hub', 'http://grid-b:4444/wd/hub', 'http://grid-c:4444/wd/hub']
+
+# the stand-in node that cannot start browsers
+BROKEN_NODE = NODES[1]
+
+
+class GridDriver(FakeDriver):
+    """FakeDriver on a stand-in grid node. Once lost, every call fails like a dead remote session."""
+
+    def __init__(self, command_executor: str, desired_capabilities: dict = None, **kwargs) -> None:
+        self.lost = False
+        super(GridDriver, self).__init__(desired_capabilities, **kwargs)
+        self.command_executor = command_executor
+
+    @property
+    def current_url(self):
+        if self.lost:
+            raise WebDriverException("session deleted, grid node is gone")
+        return self._current_url
+
+    @current_url.setter
+    def current_url(self, value):
+        self._current_url = value
+
+
+@pytest.fixture
+def stand_in_grid(monkeypatch):
+    from selenium import webdriver
+
+    attempts = []
+
+    def remote(command_executor, desired_capabilities=None, **kwargs):
+        attempts.append(command_executor)
+        if command_executor == BROKEN_NODE:
+            raise WebDriverException("Could not start a new session")
+        return GridDriver(command_executor, desired_capabilities, **kwargs)
+
+    monkeypatch.setattr(webdriver, 'Remote', remote)
+    return attempts
+
+
+def test_start_driver_skips_and_marks_down_a_failing_node():
+    grid = Grid([{'url': BROKEN_NODE, 'capacity': 2}, {'url': NODES[0], 'capacity': 1}], cooldown=60)
+
+    def create(url):
+        if url == BROKEN_NODE:
+            raise WebDriverException("Could not start a new session")
+        return GridDriver(url)
+
+    driver = grid.start_driver(create)
+    broken, healthy = grid.nodes
+    assert driver.grid_node is healthy and healthy.in_use == 1
+    assert broken.in_use == 0 and broken.down_until > time.monotonic()
+
+
+def test_lost_browser_is_replaced_on_another_node(make_scraper, stand_in_grid, monkeypatch):
+    scraper = make_scraper(grid_endpoints=[{'url': url, 'capacity': 1} for url in NODES], workers=1)
+    lost_on, completed = [], []
+
+    # the first node dies under its browser while it loads the listing
+    def get_content_browser(link, driver):
+        if driver.command_executor == NODES[0]:
+            driver.lost = True
+            lost_on.append(driver.grid_node.url)
+            raise WebDriverException("connection refused")
+        return {'address_url': link, 'node': driver.command_executor}
+
+    monkeypatch.setattr(scraper, '_get_content_browser', get_content_browser)
+    monkeypatch.setattr(scraper, '_complete', lambda link, data: completed.append(data))
+
+    scraper.pool.submit('https://x/1')
+    scraper.pool.join()
+
+    # lost on node a, node b refuses the replacement, the link completes on node c
+    assert lost_on == [NODES[0]]
+    assert stand_in_grid == NODES
+    assert completed == [{'address_url': 'https://x/1', 'node': NODES[2]}]
+    node_a, node_b, node_c = scraper.grid.nodes
+    assert node_a.down_until > time.monotonic() and node_b.down_until > time.monotonic()
+    assert (node_a.in_use, node_b.in_use, node_c.in_use) == (0, 0, 1)
+
+
+def test_full_nodes_are_never_overfilled():
+    grid = Grid([{'url': NODES[0], 'capacity': 1}, {'url': NODES[1], 'capacity': 1}], acquire_timeout=0.1)
+    node_a, node_b = grid.acquire(), grid.acquire()
+    assert {node_a, node_b} == set(grid.nodes)
+
+    # a's browser is lost: its replacement must not go onto the full node b
+    grid.release(node_a)
+    grid.mark_down(node_a)
+    with pytest.raises(RuntimeError, match='full'):
+        grid.start_driver(GridDriver)
+    assert node_b.in_use == 1
+
+
+def test_acquire_waits_for_a_released_slot():
+    import threading
+
+    grid = Grid([{'url': NODES[0], 'capacity': 1}], acquire_timeout=5)
+    node = grid.acquire()
+    threading.Timer(0.1, grid.release, args=(node,)).start()
+
+    start = time.monotonic()
+    assert grid.acquire() is node
+    assert 0.05 < time.monotonic() - start < 2
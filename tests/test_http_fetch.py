@@ -0,0 +1,53 @@
+import csv
+
+import pytest
+
+from conftest import FIXTURES
+
+
+def test_http_fetch_writes_the_listing_record(make_scraper, page_server, tmp_path):
+    outfile = tmp_path / 'listings.csv'
+    scraper = make_scraper(fetch_mode='http', outfile=str(outfile))
+    scraper.get_content(f"{page_server.url}/buy_listing.html")
+    scraper.quit_browser()
+
+    with open(outfile, encoding="utf8") as f:
+        [record] = list(csv.DictReader(f))
+    assert record['address_url'] == f"{page_server.url}/buy_listing.html"
+    assert record['address_full_address'] == '12 Station Street, Fairfield, Vic 3078'
+    assert (record['address_listing_price_high'], record['address_listing_price_low']) == ('1250000', '1150000')
+    assert (record['address_bedrooms'], record['address_bathrooms'], record['address_car_spaces']) == ('4', '2', '2')
+
+
+@pytest.mark.parametrize('route', [
+    (500, b'<html><head><title>Server error</title></head><body><h1>12 Station Street</h1></body></html>'),
+    (404, b'<html><body>not found</body></html>'),
+    # 200 but without the required address_full_address
+    (200, b'<html><body>no listing here</body></html>'),
+    # empty body, lxml cannot parse it at all
+    (200, b''),
+    (200, b'  \n ')
+])
+def test_unusable_http_responses_fall_back_to_the_browser(make_scraper, page_server, monkeypatch, route):
+    scraper = make_scraper(fetch_mode='http')
+    page_server.routes['/listing.html'] = route
+    link = f"{page_server.url}/listing.html"
+    assert scraper._get_content_http(link) is None
+
+    browser_fetches = []
+    monkeypatch.setattr(scraper, '_get_content_browser', lambda link, driver: browser_fetches.append(link) or {})
+    scraper._fetch_record(link, scraper.driver)
+    assert browser_fetches == [link]
+
+
+def test_replay_skips_unparsable_archived_pages(make_scraper, tmp_path):
+    from util.archive import PageArchive
+
+    archive = PageArchive(str(tmp_path / 'archive'))
+    archive.put('https://x/empty', '')
+    with open(f"{FIXTURES}/buy_listing.html", encoding="utf8") as f:
+        archive.put('https://x/listing', f.read())
+    archive.close()
+
+    scraper = make_scraper(replay=True, archive_path=str(tmp_path / 'archive'), driver=None)
+    assert scraper.replay_archive() == ['https://x/listing']
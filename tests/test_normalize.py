@@ -0,0 +1,62 @@
+import json
+import os
+
+import pytest
+
+from conftest import (FIXTURES, ROOT)
+from util.normalize import normalize_prices, normalize_records, normalize_sale_dates, parse_sale_date
+
+with open(os.path.join(ROOT, 'fixtures', 'price_strings.json'), encoding="utf8") as f:
+    PRICE_CORPUS = json.load(f)
+
+with open(os.path.join(FIXTURES, 'sale_dates.json'), encoding="utf8") as f:
+    SALE_DATES = json.load(f)
+
+
+@pytest.mark.parametrize('entry', PRICE_CORPUS, ids=[entry['text'] for entry in PRICE_CORPUS])
+def test_price_corpus(entry):
+    expected = {key: value for key, value in entry.items() if key != 'text'}
+    assert normalize_prices([entry['text']]) == [expected]
+
+
+def test_price_corpus_as_one_batch():
+    texts = [entry['text'] for entry in PRICE_CORPUS] * 3
+    expected = [{key: value for key, value in entry.items() if key != 'text'} for entry in PRICE_CORPUS] * 3
+    assert normalize_prices(texts) == expected
+
+
+def test_repeated_prices_are_independent_dicts():
+    first, second = normalize_prices(['Contact Agent', 'Contact Agent'])
+    first['address_listing_price_high'] = None
+    assert second['address_listing_price_high'] == 'Contact Agent'
+
+
+def test_missing_price_is_empty():
+    record, = normalize_records([{'address_url': 'https://x/1'}])
+    assert record['address_listing_price_high'] is None and record['address_listing_price_low'] is None
+
+
+@pytest.mark.parametrize('entry', SALE_DATES, ids=[entry['text'] for entry in SALE_DATES])
+def test_sale_date_corpus(entry):
+    assert parse_sale_date(entry['text']) == (entry['year_sold'], entry['month_sold'])
+
+
+def test_sale_date_corpus_as_one_batch():
+    texts = [entry['text'] for entry in SALE_DATES] + [None]
+    expected = [(entry['year_sold'], entry['month_sold']) for entry in SALE_DATES] + [(None, None)]
+    assert normalize_sale_dates(texts) == expected
+
+
+# numeric dates are day first and never reach dateparser
+@pytest.mark.parametrize('text, expected', [
+    ('Sold on 12/03/2021', (2021, 3)),
+    ('Sold on 01/12/2020', (2020, 12)),
+    ('Sold on 23.09.2020', (2020, 9)),
+    ('Sold on 2021-07-15', (2021, 7)),
+    ('Sold on 12 Mar 2021', (2021, 3))
+])
+def test_sale_date_fast_path(monkeypatch, text, expected):
+    import sys
+
+    monkeypatch.setitem(sys.modules, 'dateparser', None)
+    assert parse_sale_date(text) == expected
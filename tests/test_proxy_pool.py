@@ -0,0 +1,87 @@
+import socket
+
+import pytest
+from selenium.common.exceptions import WebDriverException
+
+from util.filter_proxy import FilteringProxy
+from util.http_fetch import HttpFetcher
+from util.proxy_pool import ProxyPool
+
+
+# plain forwarding proxies standing in for the fetched free proxies
+@pytest.fixture
+def stand_in_proxies():
+    proxies = [FilteringProxy(block_domains=[]).start() for _ in range(2)]
+    yield proxies
+    for proxy in proxies:
+        proxy.close()
+
+
+@pytest.fixture
+def dead_proxy():
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    address = f"127.0.0.1:{sock.getsockname()[1]}"
+    sock.close()
+    return address
+
+
+def test_browser_traffic_goes_through_the_chosen_proxy(make_scraper, fake_firefox, page_server, stand_in_proxies):
+    upstream = stand_in_proxies[0]
+    scraper = make_scraper(resource_blocking={'types': ['font']})
+    scraper.proxy_pool = ProxyPool(source=lambda: [upstream.address])
+
+    driver = scraper._initialize_webdriver()
+    assert driver.proxy_address == upstream.address
+    assert driver.filter_proxy.upstream == upstream.address
+
+    scraper._browser_get(driver, f"{page_server.url}/buy_listing.html")
+    assert page_server.paths == ['/buy_listing.html']
+    assert upstream.take_stats()['bytes_transferred'] > 0
+    assert scraper.proxy_pool.stats()[upstream.address]['successes'] == 1
+
+
+def test_browser_rotates_proxy_per_request(make_scraper, fake_firefox, page_server, stand_in_proxies):
+    scraper = make_scraper(resource_blocking=None)
+    scraper.proxy_pool = ProxyPool(source=lambda: [proxy.address for proxy in stand_in_proxies])
+    scraper.rotate_proxy_per_request = True
+
+    driver = scraper._initialize_webdriver()
+    for _ in stand_in_proxies:
+        scraper._browser_get(driver, f"{page_server.url}/buy_listing.html")
+
+    # untried proxies are chosen first, so each carried one page
+    assert all(proxy.take_stats()['bytes_transferred'] > 0 for proxy in stand_in_proxies)
+    assert all(health['successes'] == 1 for health in scraper.proxy_pool.stats().values())
+
+
+def test_failing_browser_proxy_is_ejected(make_scraper, fake_firefox, page_server, dead_proxy):
+    scraper = make_scraper(resource_blocking=None)
+    scraper.proxy_pool = ProxyPool(source=lambda: [dead_proxy], failure_threshold=1)
+
+    driver = scraper._initialize_webdriver()
+    assert driver.proxy == dead_proxy
+    with pytest.raises(WebDriverException):
+        scraper._browser_get(driver, f"{page_server.url}/buy_listing.html")
+
+    health = scraper.proxy_pool.stats()[dead_proxy]
+    assert health['failures'] == 1 and health['ejected']
+    assert page_server.paths == []
+
+
+def test_http_fetcher_feeds_proxy_health(page_server, stand_in_proxies, dead_proxy):
+    good = stand_in_proxies[0]
+    pool = ProxyPool(source=lambda: [good.address, dead_proxy], failure_threshold=1)
+    fetcher = HttpFetcher(proxy_pool=pool, max_retries=0, timeout=5)
+    try:
+        for _ in range(2):
+            try:
+                fetcher.fetch(f"{page_server.url}/buy_listing.html")
+            except Exception:
+                pass
+    finally:
+        fetcher.close()
+
+    stats = pool.stats()
+    assert stats[good.address]['successes'] == 1
+    assert stats[dead_proxy]['failures'] == 1 and stats[dead_proxy]['ejected']
@@ -0,0 +1,51 @@
+import pytest
+
+from util.rate_limit import (AdaptiveRateLimiter, DEFAULT_MIN_RATE)
+
+
+def test_rate_grows_past_the_fastest_fixed_sleep():
+    limiter = AdaptiveRateLimiter.from_config(None, [3, 5])
+    assert limiter.rate('host') == 0.25
+    for _ in range(100):
+        limiter.record('host', latency=0.1)
+    assert limiter.rate('host') > 1 / 3
+
+
+def test_zero_wait_between_is_unlimited_until_throttled():
+    limiter = AdaptiveRateLimiter.from_config(None, [0, 0])
+    assert all(limiter.reserve('host') == 0 for _ in range(50))
+
+    limiter.record('host', latency=0.5, status=429)
+    assert limiter.rate('host') == 1.0
+    assert limiter.reserve('host') == 0
+    assert limiter.reserve('host') > 0
+
+
+def test_configured_bounds_win():
+    limiter = AdaptiveRateLimiter.from_config({'max_rate': 2.0}, [0, 0])
+    assert limiter.rate('host') == 2.0
+    for _ in range(10):
+        limiter.record('host', latency=30, status=503)
+    assert limiter.rate('host') == DEFAULT_MIN_RATE
+
+
+def test_failed_requests_slow_the_host_down():
+    limiter = AdaptiveRateLimiter.from_config(None, [1, 1])
+    limiter.record('host', latency=0.1, failed=True)
+    assert limiter.rate('host') == 0.5
+    limiter.record('host', latency=0.1)
+    assert limiter.rate('host') == 0.55
+
+
+def test_http_connection_errors_are_recorded_as_throttling(make_scraper):
+    import socket
+
+    with socket.socket() as closed:
+        closed.bind(('127.0.0.1', 0))
+        port = closed.getsockname()[1]
+    scraper = make_scraper(fetch_mode='http', wait_between=[0.01, 0.01])
+    host = f"127.0.0.1:{port}"
+
+    for _ in range(3):
+        assert scraper._get_content_http(f"http://{host}/listing.html") is None
+    assert scraper.rate_limiter.rate(host) == pytest.approx(12.5)
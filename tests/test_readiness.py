@@ -0,0 +1,38 @@
+from selenium.common.exceptions import TimeoutException
+
+from util.readiness import wait_for_xpaths
+
+
+class ScriptDriver(object):
+    """Driver whose observer script hits the script timeout, the xpaths appear after a few polls."""
+
+    def __init__(self, ready_after: int, observer_result=None) -> None:
+        self.ready_after = ready_after
+        self.observer_result = observer_result
+        self.polls = 0
+
+    def execute_async_script(self, script, *args):
+        if self.observer_result is None:
+            raise TimeoutException("Timed out after 30 ms")
+        return self.observer_result
+
+    def execute_script(self, script, *args):
+        self.polls += 1
+        return self.polls >= self.ready_after
+
+
+def test_script_timeout_falls_back_to_polling():
+    driver = ScriptDriver(ready_after=3)
+    assert wait_for_xpaths(driver, ['//h1'], timeout=2, poll_interval=0.01) is True
+    assert driver.polls == 3
+
+
+def test_polling_fallback_stops_at_the_timeout():
+    driver = ScriptDriver(ready_after=10 ** 6)
+    assert wait_for_xpaths(driver, ['//h1'], timeout=0.1, poll_interval=0.01) is False
+
+
+def test_observer_answer_is_final():
+    driver = ScriptDriver(ready_after=1, observer_result=False)
+    assert wait_for_xpaths(driver, ['//h1'], timeout=2) is False
+    assert driver.polls == 0
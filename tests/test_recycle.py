@@ -0,0 +1,22 @@
+def test_recycled_main_browser_resumes_at_the_current_page(make_scraper, fake_firefox, page_server, monkeypatch):
+    scraper = make_scraper(driver=None, profile_cache=False, recycle={'max_pages': 2, 'prewarm_at': 0.5})
+    monkeypatch.setattr(scraper, 'wait_for_page_to_load', lambda timeout=None: None)
+    old = scraper.driver
+    page_a, page_b = f"{page_server.url}/buy_results.html", f"{page_server.url}/sold_results.html"
+
+    old.get(page_a)
+    old.add_cookie({'name': 'session', 'value': 'a'})
+    scraper.recycler.page_loaded(old)
+    scraper._recycle_main_driver()
+    assert scraper.driver is old
+    scraper.recycler._states[id(old)].replacement.result()
+
+    # the old browser moves on while its replacement is already up
+    old.get(page_b)
+    old.add_cookie({'name': 'session', 'value': 'b'})
+    scraper.recycler.page_loaded(old)
+    scraper._recycle_main_driver()
+
+    assert scraper.driver is not old
+    assert scraper.driver.current_url == page_b
+    assert {'name': 'session', 'value': 'b'} in scraper.driver.get_cookies()
@@ -0,0 +1,100 @@
+def test_every_browser_gets_its_own_options_and_user_agent(make_scraper, fake_firefox):
+    scraper = make_scraper(headless=True, user_agents=['agent-a', 'agent-b'], profile_cache=False)
+    first, second = scraper._initialize_worker_webdriver(0), scraper._initialize_worker_webdriver(1)
+
+    assert first.kwargs['firefox_options'] is not second.kwargs['firefox_options']
+    assert '--headless' in first.kwargs['firefox_options'].arguments
+    assert (first.user_agent, second.user_agent) == ('agent-a', 'agent-b')
+    assert first.kwargs['firefox_profile'].default_preferences['general.useragent.override'] == 'agent-a'
+    assert second.kwargs['firefox_profile'].default_preferences['general.useragent.override'] == 'agent-b'
+
+
+def test_browser_fallback_of_failed_http_fetches_uses_the_detail_window(make_scraper, monkeypatch):
+    from contextlib import contextmanager
+    from types import SimpleNamespace
+
+    scraper = make_scraper()
+    scraper.crawler = SimpleNamespace(crawl=lambda links: links[1:], close=lambda: None)
+    in_detail_window, fetched = [False], []
+
+    @contextmanager
+    def detail_window():
+        in_detail_window[0] = True
+        yield
+        in_detail_window[0] = False
+
+    monkeypatch.setattr(scraper, '_detail_window', detail_window)
+    monkeypatch.setattr(scraper, 'get_content', lambda link, use_http: fetched.append((link, in_detail_window[0])))
+
+    scraper.crawl_links(['https://x/1', 'https://x/2'])
+    assert fetched == [('https://x/2', True)]
+
+
+def test_fresh_listings_are_skipped_and_marked_done(make_scraper, tmp_path):
+    scraper = make_scraper(checkpoint_path=str(tmp_path / 'crawl.db'), seen_index_path=str(tmp_path / 'seen.db'))
+    scraper.checkpoint.reset(keyword=None)
+    scraper.checkpoint.save_page(0, 'https://x/results', ['https://x/1', 'https://x/2'])
+    scraper.seen_index.record(['https://x/1'], {'address_url': 'https://x/1'})
+
+    assert scraper._skip_fresh(['https://x/1', 'https://x/2']) == ['https://x/2']
+    # a resume only retries the listing that was not fresh
+    assert scraper.checkpoint.unfinished() == ['https://x/2']
+
+
+def test_replay_does_not_fetch_proxies(make_scraper, tmp_path, monkeypatch):
+    import scraper as scraper_module
+
+    def get_proxies(limit):
+        raise AssertionError("a replay fetched the proxy list")
+
+    monkeypatch.setattr(scraper_module, 'get_proxies', get_proxies)
+    scraper = make_scraper(replay=True, archive_path=str(tmp_path / 'archive'), proxy=True, driver=None)
+    assert scraper.proxy_pool is None
+
+
+def test_borrowed_logged_in_browser_skips_the_login(make_scraper, page_server):
+    from conftest import FakeDriver
+
+    driver = FakeDriver()
+    driver.logged_in = True
+    scraper = make_scraper(driver=driver, login_url=f"{page_server.url}/login", auth='user:secret',
+                           main_url=f"{page_server.url}/buy_results.html")
+    scraper._open_search_results()
+
+    assert page_server.paths == ['/buy_results.html']
+    assert driver.current_url == f"{page_server.url}/buy_results.html"
+
+
+def test_job_scrapers_share_one_metrics_endpoint(make_scraper):
+    import requests
+    from util.metrics import Metrics
+
+    metrics = Metrics(port=0).start()
+    # without shared_metrics the second scraper would bind the same port again
+    scrapers = [make_scraper(metrics={'port': metrics.port}, shared_metrics=metrics) for _ in range(2)]
+    scrapers[0].metrics.inc('listings')
+    for scraper in scrapers:
+        scraper.quit_browser()
+
+    stats = requests.get(f"http://127.0.0.1:{metrics.port}/stats", timeout=5).json()
+    assert stats['counters']['listings'] == 1
+    metrics.close()
+
+
+def test_profile_cache_temp_dir_is_removed_on_quit(make_scraper, fake_firefox, tmp_path):
+    import os
+
+    scraper = make_scraper(driver=None)
+    cache_dir = scraper.profile_cache.cache_dir
+    assert os.listdir(cache_dir)
+    scraper.quit_browser()
+    assert not os.path.exists(cache_dir)
+
+    # a given cache dir is kept for the next runs
+    kept = make_scraper(driver=None, profile_cache_dir=str(tmp_path / 'profiles'))
+    kept.quit_browser()
+    assert os.listdir(tmp_path / 'profiles')
+
+
+def test_borrowed_driver_gets_no_profile_cache(make_scraper):
+    assert make_scraper().profile_cache is None
@@ -0,0 +1,98 @@
+import os
+
+import pytest
+
+from util.sinks import (ColumnarWriter, open_sink)
+
+
+def test_columnar_writer_needs_every_file_method(tmp_path):
+    with pytest.raises(TypeError):
+        ColumnarWriter(str(tmp_path / 'out.parquet'), ['address_url'])
+
+    class NoBatches(ColumnarWriter):
+        def _open(self) -> None:
+            pass
+
+        def _close_file(self) -> None:
+            pass
+
+    with pytest.raises(TypeError, match='_write_batch'):
+        NoBatches(str(tmp_path / 'out.parquet'), ['address_url'])
+
+
+@pytest.mark.parametrize('extension', ['.parquet', '.arrow'])
+def test_columnar_sinks_write_typed_columns(tmp_path, extension):
+    pa = pytest.importorskip('pyarrow')
+    outfile = str(tmp_path / f"listings{extension}")
+    sink = open_sink(outfile, ['address_url', 'address_bedrooms'], row_group_size=2)
+    for bedrooms in ['3', None, 4]:
+        sink.write({'address_url': 'https://x/1', 'address_bedrooms': bedrooms})
+    sink.close()
+
+    if extension == '.parquet':
+        import pyarrow.parquet as pq
+        table = pq.read_table(outfile)
+    else:
+        table = pa.ipc.open_file(outfile).read_all()
+    assert table.schema.field('address_bedrooms').type == pa.int64()
+    assert table.column('address_bedrooms').to_pylist() == [3, None, 4]
+
+
+@pytest.mark.parametrize('extension', ['.parquet', '.arrow'])
+def test_second_run_writes_a_part_file_instead_of_truncating(tmp_path, extension):
+    pa = pytest.importorskip('pyarrow')
+    outfile = str(tmp_path / f"listings{extension}")
+    for run in range(3):
+        sink = open_sink(outfile, ['address_url'])
+        sink.write({'address_url': f"https://x/{run}"})
+        sink.close()
+
+    parts = [outfile, str(tmp_path / f"listings.1{extension}"), str(tmp_path / f"listings.2{extension}")]
+    assert sorted(os.listdir(tmp_path)) == sorted(os.path.basename(part) for part in parts)
+    if extension == '.parquet':
+        import pyarrow.parquet as pq
+        tables = [pq.read_table(part) for part in parts]
+    else:
+        tables = [pa.ipc.open_file(part).read_all() for part in parts]
+    assert [table.column('address_url').to_pylist() for table in tables] == [[f"https://x/{run}"] for run in range(3)]
+
+
+HEADERS = ['address_url', 'address_listing_price_high', 'address_listing_price_low', 'address_bedrooms']
+
+
+def _rows(outfile, query):
+    import sqlite3
+
+    with sqlite3.connect(outfile) as conn:
+        return conn.execute(query).fetchall()
+
+
+def test_sqlite_flush_waits_for_the_commit(tmp_path):
+    outfile = str(tmp_path / 'listings.db')
+    sink = open_sink(outfile, HEADERS, flush_interval=60)
+    sink.write({'address_url': 'https://x/1', 'address_listing_price_high': 500000})
+    sink.flush()
+    assert _rows(outfile, "SELECT address_url FROM listings") == [('https://x/1',)]
+    sink.close()
+
+
+def test_sqlite_upserts_listings_and_records_price_changes(tmp_path):
+    outfile = str(tmp_path / 'listings.db')
+    sink = open_sink(outfile, HEADERS, flush_every=100, flush_interval=60)
+    # the same listing twice in one batch gives one listing row and one history row
+    sink.write({'address_url': 'https://x/1', 'address_listing_price_high': 500000, 'address_bedrooms': 3})
+    sink.write({'address_url': 'https://x/1', 'address_listing_price_high': 500000, 'address_bedrooms': 4})
+    sink.write({'address_url': 'https://x/2', 'address_listing_price_high': 700000})
+    sink.flush()
+    # unchanged price: no history row. changed price: one more
+    sink.write({'address_url': 'https://x/1', 'address_listing_price_high': 500000})
+    sink.flush()
+    sink.write({'address_url': 'https://x/1', 'address_listing_price_high': 450000})
+    sink.close()
+
+    assert _rows(outfile, "SELECT address_url, address_listing_price_high FROM listings ORDER BY address_url") == [
+        ('https://x/1', 450000), ('https://x/2', 700000)
+    ]
+    assert _rows(outfile, "SELECT address_url, price_high FROM price_history ORDER BY rowid") == [
+        ('https://x/1', 500000), ('https://x/2', 700000), ('https://x/1', 450000)
+    ]
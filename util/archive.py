@@ -0,0 +1,164 @@
+from typing import (Iterator, Optional, Tuple)
+
+import threading
+import hashlib
+import sqlite3
+import logging
+import zlib
+import time
+import os
+
+
+log = logging.getLogger(__name__)
+
+SEGMENT_NAME = "segment-{:05d}.dat"
+
+
+class PageArchive(object):
+    def __init__(self,
+                 path: str,
+                 segment_size: int = 256 * 1024 * 1024,
+                 compression_level: int = 6,
+                 commit_every: int = 50) -> None:
+        """Compressed on-disk archive of fetched pages with a SQLite index.
+
+        Pages are zlib-compressed and appended to segment files of at most
+        segment_size bytes. Every page is keyed by the sha1 of its url and fetch
+        time and indexed by url, fetch time, segment and offset. Segments are
+        append-only, so the archive can grow to millions of pages and be
+        replayed with sequential reads.
+
+        Parameters
+        ----------
+        path (Required) -- archive directory, created if missing
+        segment_size (Optional) -- bytes after which a new segment file is started
+        compression_level (Optional) -- zlib level, 1 (fast) to 9 (small)
+        commit_every (Optional) -- pages per index transaction
+
+        """
+        self.path = path
+        self.segment_size = segment_size
+        self.compression_level = compression_level
+        self.commit_every = commit_every
+        os.makedirs(path, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.join(path, 'index.db'), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS pages (
+                key TEXT PRIMARY KEY,
+                url TEXT,
+                final_url TEXT,
+                fetched_at REAL,
+                segment INTEGER,
+                offset INTEGER,
+                length INTEGER,
+                size INTEGER
+            );
+            CREATE INDEX IF NOT EXISTS pages_url ON pages (url, fetched_at);
+        """)
+        self.conn.commit()
+
+        last = self.conn.execute("SELECT MAX(segment) FROM pages").fetchone()[0]
+        self._segment = last or 0
+        self._file = None
+        self._uncommitted = 0
+
+    @staticmethod
+    def key(url: str, fetched_at: float) -> str:
+        return hashlib.sha1(f"{url}\n{fetched_at!r}".encode('utf8')).hexdigest()
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.path, SEGMENT_NAME.format(segment))
+
+    def _open_segment(self, size: int):
+        if self._file is None:
+            self._file = open(self._segment_path(self._segment), 'ab')
+        if self._file.tell() and self._file.tell() + size > self.segment_size:
+            self._file.close()
+            self._segment += 1
+            self._file = open(self._segment_path(self._segment), 'ab')
+        return self._file
+
+    def put(self, url: str, page: str, final_url: str = None, fetched_at: float = None) -> str:
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        data = page.encode('utf8')
+        compressed = zlib.compress(data, self.compression_level)
+        key = self.key(url, fetched_at)
+
+        with self._lock:
+            segment_file = self._open_segment(len(compressed))
+            offset = segment_file.tell()
+            segment_file.write(compressed)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, url, final_url or url, fetched_at, self._segment, offset, len(compressed), len(data))
+            )
+            self._uncommitted += 1
+            if self._uncommitted >= self.commit_every:
+                self._commit()
+        return key
+
+    # segment data first, so the index never points past the end of a segment
+    def _commit(self) -> None:
+        if self._file is not None:
+            self._file.flush()
+        self.conn.commit()
+        self._uncommitted = 0
+
+    def _read(self, segment: int, offset: int, length: int) -> str:
+        with open(self._segment_path(segment), 'rb') as f:
+            f.seek(offset)
+            return zlib.decompress(f.read(length)).decode('utf8')
+
+    # latest archived page of url fetched at or before `at`, None when there is none
+    def get(self, url: str, at: float = None) -> Optional[str]:
+        with self._lock:
+            self._commit()
+            row = self.conn.execute(
+                "SELECT segment, offset, length FROM pages WHERE url = ? AND fetched_at <= ? "
+                "ORDER BY fetched_at DESC LIMIT 1",
+                (url, time.time() if at is None else at)
+            ).fetchone()
+        return self._read(*row) if row is not None else None
+
+    # (url, final_url, fetched_at, page) of the latest fetch of every url, read segment by segment.
+    # rows stream from a read-only connection of their own, so puts are not blocked during a replay
+    def iter_latest(self, since: float = None) -> Iterator[Tuple[str, str, float, str]]:
+        with self._lock:
+            self._commit()
+        reader = sqlite3.connect(f"file:{os.path.join(self.path, 'index.db')}?mode=ro", uri=True)
+        rows = reader.execute("""
+            SELECT url, final_url, fetched_at, segment, offset, length FROM pages AS p
+            WHERE fetched_at = (SELECT MAX(fetched_at) FROM pages WHERE url = p.url) AND fetched_at >= ?
+            ORDER BY segment, offset
+        """, (since or 0,))
+
+        current, segment_file = None, None
+        try:
+            for url, final_url, fetched_at, segment, offset, length in rows:
+                if segment != current:
+                    if segment_file is not None:
+                        segment_file.close()
+                    segment_file = open(self._segment_path(segment), 'rb')
+                    current = segment
+                segment_file.seek(offset)
+                yield url, final_url, fetched_at, zlib.decompress(segment_file.read(length)).decode('utf8')
+        finally:
+            if segment_file is not None:
+                segment_file.close()
+            reader.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._commit()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self.conn.close()
@@ -0,0 +1,157 @@
+from collections import Counter
+from typing import (List, Callable)
+
+import threading
+import logging
+import queue
+import time
+
+
+log = logging.getLogger(__name__)
+
+
+# raised by the work function when the worker's browser (or the grid node running it) is gone
+class DriverLost(Exception):
+    pass
+
+
+class BrowserPool(object):
+    def __init__(self,
+                 driver_factory: Callable[[int], object],
+                 work: Callable[[object, str], None],
+                 workers: int = 2,
+                 recycle: Callable[[object], object] = None,
+                 max_requeues: int = 2) -> None:
+        """Pool of browser workers consuming a shared queue of detail links.
+
+        Parameters
+        ----------
+        driver_factory (Required) -- called with the worker index, returns that worker's webdriver
+        work (Required) -- called with (driver, link) for every queued link, from the worker's thread
+        workers (Optional) -- number of browsers/threads
+        recycle (Optional) -- called with a worker's driver after each link, returns the driver to continue with
+        max_requeues (Optional) -- times a link is handed to another browser after its browser was lost (DriverLost)
+
+        """
+        self.driver_factory = driver_factory
+        self.work = work
+        self.workers = workers
+        self.recycle = recycle
+        self.max_requeues = max_requeues
+
+        self.tasks = queue.Queue()
+        self.drivers: List[object] = []
+        self.threads: List[threading.Thread] = []
+        self._drivers_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._requeues = Counter()
+
+    def start(self) -> None:
+        for index in range(self.workers):
+            thread = threading.Thread(
+                target=self._worker,
+                args=(index,),
+                name=f"browser-worker-{index}",
+                daemon=True
+            )
+            thread.start()
+            self.threads.append(thread)
+        log.info(f"Started browser pool with {self.workers} workers")
+
+    def submit(self, link: str) -> None:
+        self.tasks.put(link)
+
+    # block until every submitted link is processed. polls so Ctrl-C is never swallowed by a lock wait
+    def join(self) -> None:
+        while self.tasks.unfinished_tasks and any(thread.is_alive() for thread in self.threads):
+            time.sleep(0.2)
+
+    # builds and registers a browser for worker index, None when it cannot start or the pool is closing
+    def _start_driver(self, index: int):
+        try:
+            driver = self.driver_factory(index)
+        except Exception as e:
+            log.error(f"Worker {index} failed to start its browser. Error: {e}")
+            return None
+
+        with self._drivers_lock:
+            registered = not self._stop.is_set()
+            if registered:
+                self.drivers.append(driver)
+        if not registered:
+            driver.quit()
+            return None
+        return driver
+
+    # drops a lost browser and starts another one, the factory decides where it runs
+    def _replace_driver(self, index: int, driver):
+        with self._drivers_lock:
+            self.drivers = [d for d in self.drivers if d is not driver]
+        try:
+            driver.quit()
+        except Exception:
+            pass
+        return self._start_driver(index)
+
+    def _requeue(self, link: str) -> None:
+        with self._drivers_lock:
+            self._requeues[link] += 1
+            attempts = self._requeues[link]
+        if attempts > self.max_requeues:
+            log.error(f"Giving up on {link} after losing {attempts} browsers on it")
+            return
+        self.tasks.put(link)
+
+    def _worker(self, index: int) -> None:
+        driver = self._start_driver(index)
+        if driver is None:
+            return
+
+        while not self._stop.is_set():
+            try:
+                link = self.tasks.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            try:
+                self.work(driver, link)
+            except DriverLost as e:
+                log.warning(f"Worker {index} lost its browser on {link}, handing the link over. Error: {e}")
+                self._requeue(link)
+                driver = self._replace_driver(index, driver)
+                if driver is None:
+                    return
+            except Exception as e:
+                log.error(f"Worker {index} failed on {link}. Error: {e}")
+            finally:
+                self.tasks.task_done()
+
+            if self.recycle is not None and not self._stop.is_set():
+                driver = self._recycle(index, driver)
+
+    # swaps in the replacement of a recycled driver, the old one is quit by the recycler
+    def _recycle(self, index: int, driver):
+        try:
+            replacement = self.recycle(driver)
+        except Exception as e:
+            log.error(f"Worker {index} failed to recycle its browser. Error: {e}")
+            return driver
+        if replacement is not driver:
+            with self._drivers_lock:
+                self.drivers = [replacement if d is driver else d for d in self.drivers]
+        return replacement
+
+    # stop the workers and quit every browser, also safe to call while workers are busy
+    def close(self, timeout: float = 10) -> None:
+        self._stop.set()
+        for thread in self.threads:
+            thread.join(timeout=timeout)
+
+        with self._drivers_lock:
+            drivers, self.drivers = self.drivers, []
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception as e:
+                log.warning(f"Error quitting pooled browser. Error: {e}")
+        log.info("Browser pool closed")
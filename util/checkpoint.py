@@ -0,0 +1,117 @@
+from typing import (List, Optional)
+
+import threading
+import sqlite3
+import logging
+import time
+import json
+
+
+log = logging.getLogger(__name__)
+
+PENDING = 'pending'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class CrawlCheckpoint(object):
+    def __init__(self, path: str) -> None:
+        """Crash-safe crawl state persisted to SQLite as the crawl runs.
+
+        Stores the current results page (url and index) plus every listing url
+        found so far with its status (pending, done or failed). Every write is
+        committed immediately, so the file is usable after a crash or Ctrl-C.
+
+        Parameters
+        ----------
+        path (Required) -- path of the SQLite checkpoint file
+
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS crawl_state (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+            CREATE TABLE IF NOT EXISTS listings (
+                url TEXT PRIMARY KEY,
+                page INTEGER,
+                status TEXT,
+                updated_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS listings_status ON listings (status, page);
+        """)
+        self.conn.commit()
+
+    def _execute(self, sql: str, params=()) -> None:
+        with self._lock:
+            self.conn.execute(sql, params)
+            self.conn.commit()
+
+    # start a new crawl, dropping any previous state
+    def reset(self, **meta: dict) -> None:
+        with self._lock:
+            self.conn.execute("DELETE FROM crawl_state")
+            self.conn.execute("DELETE FROM listings")
+            self.conn.execute(
+                "INSERT INTO crawl_state (key, value) VALUES ('meta', ?)", (json.dumps(meta),)
+            )
+            self.conn.commit()
+
+    def save_page(self, page: int, results_url: str, links: List[str]) -> None:
+        now = time.time()
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO crawl_state (key, value) VALUES ('page', ?)",
+                (json.dumps({'page': page, 'results_url': results_url}),)
+            )
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO listings (url, page, status, updated_at) VALUES (?, ?, ?, ?)",
+                [(link, page, PENDING, now) for link in links]
+            )
+            self.conn.commit()
+
+    def mark(self, url: str, status: str) -> None:
+        self._execute(
+            "UPDATE listings SET status = ?, updated_at = ? WHERE url = ?", (status, time.time(), url)
+        )
+
+    def _get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            row = self.conn.execute("SELECT value FROM crawl_state WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    # crawl metadata given to reset(), e.g. the keyword the crawl was started with
+    def meta(self) -> dict:
+        return self._get('meta') or {}
+
+    # last saved results page as {'page': int, 'results_url': str}, None when nothing was saved
+    def state(self) -> Optional[dict]:
+        return self._get('page')
+
+    # listings of earlier pages that were never completed (pending or failed)
+    def unfinished(self, before_page: int = None) -> List[str]:
+        sql = "SELECT url FROM listings WHERE status != ?"
+        params = [DONE]
+        if before_page is not None:
+            sql += " AND page < ?"
+            params.append(before_page)
+        with self._lock:
+            return [row[0] for row in self.conn.execute(sql + " ORDER BY page", params)]
+
+    def completed(self, urls: List[str]) -> set:
+        with self._lock:
+            return {
+                row[0] for row in self.conn.execute(
+                    f"SELECT url FROM listings WHERE status = ? AND url IN ({','.join('?' * len(urls))})",
+                    [DONE] + list(urls)
+                )
+            } if urls else set()
+
+    def close(self) -> None:
+        with self._lock:
+            self.conn.close()
@@ -0,0 +1,73 @@
+from concurrent.futures import ThreadPoolExecutor
+from collections import defaultdict
+from urllib.parse import urlparse
+from typing import (List, Callable, Optional)
+
+import asyncio
+import logging
+import random
+
+
+log = logging.getLogger(__name__)
+
+
+class AsyncCrawler(object):
+    def __init__(self,
+                 fetch: Callable[[str], Optional[dict]],
+                 on_record: Callable[[str, dict], None],
+                 max_concurrency: int = 16,
+                 max_per_host: int = 4,
+                 connection_delay: list = None) -> None:
+        """Concurrent detail-page crawler driven by asyncio.
+
+        Parameters
+        ----------
+        fetch (Required) -- blocking callable returning the record of a link, or None when it failed
+        on_record (Required) -- called with (link, record) for every finished record, always from the event loop thread
+        max_concurrency (Optional) -- global limit of in-flight fetches
+        max_per_host (Optional) -- limit of in-flight fetches per host, i.e. connections per host
+        connection_delay (Optional) -- [min, max] seconds a host connection rests after each fetch
+
+        """
+        self.fetch = fetch
+        self.on_record = on_record
+        self.max_concurrency = max_concurrency
+        self.max_per_host = max_per_host
+        self.connection_delay = connection_delay or [0, 0]
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency)
+
+    # crawl a batch of links, returns the links whose fetch failed
+    def crawl(self, links: List[str]) -> List[str]:
+        return asyncio.run(self._crawl(links))
+
+    async def _crawl(self, links: List[str]) -> List[str]:
+        global_slots = asyncio.Semaphore(self.max_concurrency)
+        host_slots = defaultdict(lambda: asyncio.Semaphore(self.max_per_host))
+
+        results = await asyncio.gather(
+            *(self._visit(link, global_slots, host_slots) for link in links)
+        )
+        return [link for link, ok in zip(links, results) if not ok]
+
+    async def _visit(self, link: str, global_slots: asyncio.Semaphore, host_slots: dict) -> bool:
+        loop = asyncio.get_running_loop()
+
+        async with host_slots[urlparse(link).netloc]:
+            async with global_slots:
+                try:
+                    record = await loop.run_in_executor(self.executor, self.fetch, link)
+                except Exception as e:
+                    log.error(f"Failed fetching {link}. Error: {e}")
+                    record = None
+
+            if record is not None:
+                self.on_record(link, record)
+
+            # politeness delay holds this host connection only, other hosts and connections keep going
+            a, b = self.connection_delay
+            await asyncio.sleep(random.uniform(a, b))
+
+        return record is not None
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=True)
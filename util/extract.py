@@ -0,0 +1,199 @@
+from selenium.common.exceptions import NoSuchElementException
+from typing import (List, Dict, Union, Tuple)
+from lxml import etree, html
+from functools import lru_cache
+
+import logging
+import re
+
+
+log = logging.getLogger(__name__)
+
+# listing fields pulled from a detail page, in record order. each field maps
+# to the '<field>_xpath' selector of the scraper config
+CONTENT_FIELDS = [
+    'address_listing_price',
+    'address_bedrooms',
+    'address_bathrooms',
+    'address_car_spaces',
+    'address_property_type',
+    'address_description',
+    'address_full_address',
+    'property_size',
+    'property_distance_from_schools_aggregate',
+    'date'
+]
+
+# fields collected from every matching node instead of the first one
+MULTI_VALUE_FIELDS = ['property_distance_from_schools_aggregate']
+
+# evaluates every selector of arguments[0] in the page and returns the raw
+# texts in a single object: null for no match, a list for multi-value fields
+EXTRACT_SCRIPT = """
+var xpaths = arguments[0], multi = arguments[1], out = {};
+function nodeText(node) {
+    var text = node.nodeType === 1 ? node.innerText : node.textContent;
+    return (text || '').trim();
+}
+for (var field in xpaths) {
+    try {
+        if (multi.indexOf(field) !== -1) {
+            var snapshot = document.evaluate(
+                xpaths[field], document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null
+            );
+            var items = [];
+            for (var i = 0; i < snapshot.snapshotLength; i++) {
+                items.push(nodeText(snapshot.snapshotItem(i)));
+            }
+            out[field] = items;
+        } else {
+            var node = document.evaluate(
+                xpaths[field], document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null
+            ).singleNodeValue;
+            out[field] = node ? nodeText(node) : null;
+        }
+    } catch (e) {
+        out[field] = null;
+    }
+}
+return out;
+"""
+
+# elements rendered on their own line, mirroring WebElement.text line breaks
+BLOCK_TAGS = {
+    'address', 'article', 'aside', 'blockquote', 'dd', 'div', 'dl', 'dt', 'figcaption', 'figure',
+    'footer', 'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr', 'li', 'main', 'nav',
+    'ol', 'p', 'pre', 'section', 'table', 'tr', 'ul'
+}
+
+# elements whose content is never rendered as text
+SKIPPED_TAGS = {'script', 'style', 'noscript', 'template'}
+
+RawRecord = Dict[str, Union[str, List[str], None]]
+
+
+# maps content fields to their configured xpath selector
+def content_xpaths(xpath: dict) -> Dict[str, str]:
+    return {
+        field: xpath[f"{field}_xpath"] for field in CONTENT_FIELDS if f"{field}_xpath" in xpath
+    }
+
+
+# raw field texts through one WebDriver call per selector
+def extract_with_webdriver(driver, xpaths: Dict[str, str]) -> RawRecord:
+    raw = {}
+    for field in CONTENT_FIELDS:
+        if field not in xpaths:
+            raw[field] = [] if field in MULTI_VALUE_FIELDS else None
+        elif field in MULTI_VALUE_FIELDS:
+            raw[field] = [el.text for el in driver.find_elements_by_xpath(xpaths[field])]
+        else:
+            try:
+                raw[field] = driver.find_element_by_xpath(xpaths[field]).text
+            except NoSuchElementException:
+                raw[field] = None
+    return raw
+
+
+# raw field texts for the whole selector dict in a single execute_script round trip
+def extract_with_script(driver, xpaths: Dict[str, str]) -> RawRecord:
+    extracted = driver.execute_script(EXTRACT_SCRIPT, xpaths, MULTI_VALUE_FIELDS) or {}
+    raw = {}
+    for field in CONTENT_FIELDS:
+        default = [] if field in MULTI_VALUE_FIELDS else None
+        raw[field] = extracted.get(field, default)
+        if raw[field] is None:
+            raw[field] = default
+    return raw
+
+
+# full DOM snapshot of the current page in one round trip
+def snapshot_html(driver) -> str:
+    return driver.execute_script("return document.documentElement.outerHTML")
+
+
+@lru_cache(maxsize=32)
+def _compile_xpaths(items: Tuple[Tuple[str, str], ...]) -> Dict[str, etree.XPath]:
+    return {field: etree.XPath(selector) for field, selector in items}
+
+
+# compiled lxml selectors, built once per distinct config and reused across pages
+def compile_xpaths(xpaths: Dict[str, str]) -> Dict[str, etree.XPath]:
+    return _compile_xpaths(tuple(sorted(xpaths.items())))
+
+
+# whitespace collapsed in rendered text. unlike \s it leaves non-breaking spaces alone
+COLLAPSED_WHITESPACE = re.compile(r'[ \t\n\r\f\v]+')
+
+
+# text of a text node appended to the current line, source line breaks and indentation collapsed to one space
+def _append_text(lines: list, text: str, preformatted: bool) -> None:
+    if preformatted:
+        first, *rest = text.split('\n')
+        lines[-1] += first
+        lines.extend(rest)
+        return
+    text = COLLAPSED_WHITESPACE.sub(' ', text)
+    if text.startswith(' ') and (not lines[-1] or lines[-1].endswith(' ')):
+        text = text[1:]
+    lines[-1] += text
+
+
+# rendered lines of an element, following selenium's WebElement.text: <br> ends the line,
+# block elements start and end their own line
+def _collect_lines(node, lines: list, preformatted: bool = False) -> None:
+    if not isinstance(node.tag, str) or node.tag in SKIPPED_TAGS:
+        if node.tail:
+            _append_text(lines, node.tail, preformatted)
+        return
+
+    block = node.tag in BLOCK_TAGS
+    if node.tag == 'br':
+        lines.append('')
+    elif block and lines[-1]:
+        lines.append('')
+
+    inner = preformatted or node.tag == 'pre'
+    if node.text:
+        _append_text(lines, node.text, inner)
+    for child in node:
+        _collect_lines(child, lines, inner)
+
+    if block and lines[-1]:
+        lines.append('')
+    if node.tail:
+        _append_text(lines, node.tail, preformatted)
+
+
+# rendered text of an xpath result, whitespace-normalized like WebElement.text
+def node_text(node) -> str:
+    if isinstance(node, str):
+        lines = (' '.join(line.split()) for line in node.splitlines())
+        return '\n'.join(line for line in lines if line)
+
+    lines = ['']
+    tail, node.tail = node.tail, None
+    try:
+        _collect_lines(node, lines)
+    finally:
+        node.tail = tail
+    return '\n'.join(line.strip(' \t\n\r') for line in lines).strip(' \t\n\r').replace('\xa0', ' ')
+
+
+# raw field texts evaluated offline with lxml against a parsed page
+def extract_from_tree(tree, compiled: Dict[str, etree.XPath]) -> RawRecord:
+    raw = {}
+    for field in CONTENT_FIELDS:
+        matches = compiled[field](tree) if field in compiled else []
+        if not isinstance(matches, list):
+            matches = [matches]
+        if field in MULTI_VALUE_FIELDS:
+            raw[field] = [node_text(match) for match in matches]
+        else:
+            raw[field] = node_text(matches[0]) if matches else None
+    return raw
+
+
+# raw field texts from an html string, e.g. a snapshot stored on disk
+def extract_from_html(page: str, compiled: Dict[str, etree.XPath]) -> RawRecord:
+    return extract_from_tree(html.fromstring(page), compiled)
@@ -0,0 +1,249 @@
+from http.server import (BaseHTTPRequestHandler, ThreadingHTTPServer)
+from urllib.parse import urlsplit
+from fnmatch import fnmatch
+from typing import (List, Optional)
+
+import threading
+import logging
+import select
+import socket
+
+
+log = logging.getLogger(__name__)
+
+# url extensions per resource type, matched on plain-http requests
+RESOURCE_EXTENSIONS = {
+    'image': ['.png', '.jpg', '.jpeg', '.gif', '.webp', '.svg', '.ico', '.bmp', '.avif'],
+    'font': ['.woff', '.woff2', '.ttf', '.otf', '.eot'],
+    'stylesheet': ['.css'],
+    'media': ['.mp4', '.webm', '.ogg', '.mp3', '.m3u8', '.ts', '.mov']
+}
+
+# firefox preferences blocking each resource type in the browser itself
+RESOURCE_PREFS = {
+    'image': {
+        'permissions.default.image': 2
+    },
+    'font': {
+        'browser.display.use_document_fonts': 0,
+        'gfx.downloadable_fonts.enabled': False
+    },
+    'stylesheet': {
+        'permissions.default.stylesheet': 2
+    },
+    'media': {
+        'media.autoplay.default': 5,
+        'media.mp4.enabled': False,
+        'media.webm.enabled': False,
+        'media.ogg.enabled': False
+    },
+    'plugin': {
+        'dom.ipc.plugins.enabled.libflashplayer.so': 'false',
+        'plugin.state.flash': 0
+    }
+}
+
+# ad, analytics and tracking hosts blocked by default
+DEFAULT_BLOCK_DOMAINS = [
+    '*doubleclick.net',
+    '*googlesyndication.com',
+    '*google-analytics.com',
+    '*googletagmanager.com',
+    '*googletagservices.com',
+    '*facebook.net',
+    '*facebook.com',
+    '*hotjar.com',
+    '*newrelic.com',
+    '*nr-data.net',
+    '*adnxs.com',
+    '*criteo.com',
+    '*criteo.net',
+    '*scorecardresearch.com',
+    '*optimizely.com',
+    '*tiqcdn.com',
+    '*youtube.com',
+    '*ytimg.com'
+]
+
+
+def host_matches(host: str, patterns: List[str]) -> bool:
+    host = host.lower()
+    return any(fnmatch(host, pattern.lower()) for pattern in patterns)
+
+
+class _ProxyHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'FilteringProxy'
+
+    def log_message(self, format, *args):
+        log.debug("filter proxy: " + format % args)
+
+    def _reject(self) -> None:
+        self.server.proxy.count_blocked()
+        self.send_response(403)
+        self.send_header('Content-Length', '0')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+
+    def _dial(self, host: str, port: int) -> socket.socket:
+        proxy = self.server.proxy
+        if proxy.upstream is None:
+            return socket.create_connection((host, port), timeout=proxy.timeout)
+        upstream_host, upstream_port = proxy.upstream.rsplit(':', 1)
+        return socket.create_connection((upstream_host, int(upstream_port)), timeout=proxy.timeout)
+
+    # tcp tunnel to host, through the upstream proxy's own CONNECT when chained
+    def _tunnel(self, host: str, port: int) -> socket.socket:
+        upstream = self._dial(host, port)
+        if self.server.proxy.upstream is None:
+            return upstream
+
+        upstream.sendall(f"CONNECT {host}:{port} HTTP/1.1\r\nHost: {host}:{port}\r\n\r\n".encode('ascii'))
+        reply = b''
+        while b'\r\n\r\n' not in reply:
+            chunk = upstream.recv(4096)
+            if not chunk:
+                break
+            reply += chunk
+        if b' 200' not in reply.split(b'\r\n', 1)[0]:
+            upstream.close()
+            raise OSError(f"Upstream proxy refused CONNECT {host}:{port}")
+        return upstream
+
+    def _relay(self, upstream: socket.socket) -> None:
+        sockets = [self.connection, upstream]
+        try:
+            while True:
+                readable, _, errored = select.select(sockets, [], sockets, self.server.proxy.timeout)
+                if errored or not readable:
+                    break
+                for sock in readable:
+                    data = sock.recv(65536)
+                    if not data:
+                        return
+                    # counted first, so the stats include the data once the other side has it
+                    self.server.proxy.count_transferred(len(data))
+                    (upstream if sock is self.connection else self.connection).sendall(data)
+        finally:
+            upstream.close()
+
+    # https: tunnel, only the host is visible so filtering is by domain
+    def do_CONNECT(self):
+        host, _, port = self.path.partition(':')
+        if not self.server.proxy.allowed(host):
+            return self._reject()
+        try:
+            upstream = self._tunnel(host, int(port or 443))
+        except OSError as e:
+            log.debug(f"filter proxy: cannot reach {self.path}. Error: {e}")
+            self.send_error(502)
+            return
+        self.send_response(200, 'Connection Established')
+        self.end_headers()
+        self._relay(upstream)
+        self.close_connection = True
+
+    # plain http: filtered by domain and by resource type (url extension)
+    def _forward(self):
+        url = urlsplit(self.path)
+        if not self.server.proxy.allowed(url.hostname or '', url.path):
+            return self._reject()
+
+        try:
+            upstream = self._dial(url.hostname, url.port or 80)
+        except OSError as e:
+            log.debug(f"filter proxy: cannot reach {self.path}. Error: {e}")
+            self.send_error(502)
+            return
+
+        # an upstream proxy expects the absolute url, an origin server only the path
+        target = self.path if self.server.proxy.upstream else (url.path or '/') + (f"?{url.query}" if url.query else '')
+        headers = ''.join(
+            f"{key}: {value}\r\n" for key, value in self.headers.items()
+            if key.lower() not in ('proxy-connection', 'connection', 'keep-alive')
+        )
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0) or 0))
+        upstream.sendall(f"{self.command} {target} HTTP/1.1\r\n{headers}Connection: close\r\n\r\n".encode('latin-1') + body)
+        self._relay(upstream)
+        self.close_connection = True
+
+    do_GET = do_POST = do_HEAD = do_PUT = do_DELETE = do_OPTIONS = do_PATCH = _forward
+
+
+class FilteringProxy(object):
+    def __init__(self,
+                 block_types: List[str] = None,
+                 block_domains: List[str] = None,
+                 allow_domains: List[str] = None,
+                 upstream: Optional[str] = None,
+                 timeout: float = 60) -> None:
+        """Small local HTTP(S) proxy dropping unwanted requests before they leave the machine.
+
+        Drivers route through it to block ad/analytics hosts and third-party
+        frames (by domain, for http and https) and resource types (by url
+        extension, plain http only). It can chain to an upstream proxy and
+        counts blocked requests and relayed bytes per page. Requests Firefox
+        drops itself (e.g. images turned off by preference) never reach the
+        proxy and are not counted.
+
+        Parameters
+        ----------
+        block_types (Optional) -- resource types to block, keys of RESOURCE_EXTENSIONS
+        block_domains (Optional) -- host patterns to block, e.g. '*doubleclick.net'
+        allow_domains (Optional) -- when set, only hosts matching these patterns are let through
+        upstream (Optional) -- 'ip:port' of a proxy the allowed traffic is forwarded to
+        timeout (Optional) -- socket timeout in seconds
+
+        """
+        self.block_extensions = tuple(
+            extension for resource in (block_types or []) for extension in RESOURCE_EXTENSIONS.get(resource, [])
+        )
+        self.block_domains = DEFAULT_BLOCK_DOMAINS if block_domains is None else block_domains
+        self.allow_domains = allow_domains
+        self.upstream = upstream
+        self.timeout = timeout
+
+        self._lock = threading.Lock()
+        self._blocked = 0
+        self._transferred = 0
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _ProxyHandler)
+        self.server.daemon_threads = True
+        self.server.proxy = self
+        self.address = f"127.0.0.1:{self.server.server_address[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, name="filter-proxy", daemon=True)
+
+    def start(self) -> 'FilteringProxy':
+        self._thread.start()
+        log.info(f"Filtering proxy listening on {self.address}")
+        return self
+
+    def allowed(self, host: str, path: str = '') -> bool:
+        if self.allow_domains and not host_matches(host, self.allow_domains):
+            return False
+        if host_matches(host, self.block_domains):
+            return False
+        return not (self.block_extensions and path.lower().endswith(self.block_extensions))
+
+    def count_blocked(self) -> None:
+        with self._lock:
+            self._blocked += 1
+
+    def count_transferred(self, size: int) -> None:
+        with self._lock:
+            self._transferred += size
+
+    # counters since the last call, i.e. for the page just loaded
+    def take_stats(self) -> dict:
+        with self._lock:
+            stats = {
+                'blocked_requests': self._blocked,
+                'bytes_transferred': self._transferred
+            }
+            self._blocked = self._transferred = 0
+        return stats
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
@@ -1,22 +1,28 @@
+from typing import List
+
 import logging
 import sys
 import csv
 import os
 import json
-from lxml.html import fromstring
-import requests
 from itertools import cycle
 import traceback
+import threading
+import atexit
+import time
 import re
 
 
 # module for obtaining a list of free proxy servers from free-proxy-list.net
-def get_proxies() -> list:
+def get_proxies(limit: int = 10) -> list:
+    from lxml.html import fromstring
+    import requests
+
     url = 'https://free-proxy-list.net/'
     response = requests.get(url)
     parser = fromstring(response.text)
     proxies = list()
-    for i in parser.xpath('//tbody/tr')[:10]:
+    for i in parser.xpath('//tbody/tr')[:limit]:
         if i.xpath('.//td[7][contains(text(),"yes")]'):
             proxy = ":".join([i.xpath('.//td[1]/text()')[0], i.xpath('.//td[2]/text()')[0]])
             proxies.append(proxy)
@@ -45,6 +51,61 @@ def store_to_csv(data: dict, outfile: str, headers: list) -> None:
         writer.writerow(data)
 
 
+# long-lived buffered CSV writer, owned by the Scraper for the whole run and safe to share across threads
+class CsvWriter(object):
+    def __init__(self, outfile: str, headers: list, flush_every: int = 50, flush_interval: float = 5.0) -> None:
+        self.outfile = outfile
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+
+        self._lock = threading.RLock()
+        self._file = open(outfile, 'a', encoding="utf8")
+        self._writer = csv.DictWriter(self._file, delimiter=',', lineterminator='\n', fieldnames=headers)
+        if self._file.tell() == 0:
+            self._writer.writeheader()
+        self._buffer = []
+        self._last_flush = time.monotonic()
+        self._closed = False
+
+        # flushes rows of an idle crawl, so a crash loses at most one interval/buffer
+        self._stop = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_periodically, name="csv-flusher", daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+
+    def write(self, data: dict) -> None:
+        with self._lock:
+            self._buffer.append(data)
+            if len(self._buffer) >= self.flush_every or time.monotonic() - self._last_flush >= self.flush_interval:
+                self.flush()
+
+    def flush(self, sync: bool = False) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            if self._buffer:
+                self._writer.writerows(self._buffer)
+                self._buffer = []
+            self._file.flush()
+            if sync:
+                os.fsync(self._file.fileno())
+            self._last_flush = time.monotonic()
+
+    def _flush_periodically(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._stop.set()
+            self.flush(sync=True)
+            self._closed = True
+            self._file.close()
+        atexit.unregister(self.close)
+
+
 # json config loader
 def load_json_config(config_file: json) -> dict:
     try:
@@ -59,6 +120,56 @@ def load_json_config(config_file: json) -> dict:
         print(f"Error in loading config file. {e}")
 
 
+# problems of a scraper_config found without starting a browser, empty when it is valid
+def check_scraper_config(config: dict) -> List[str]:
+    from util.readiness import PAGE_LOAD_STRATEGIES
+    from util.sinks import FORMAT_EXTENSIONS
+    from lxml import etree
+
+    problems = []
+    if not config.get('main_url') and not config.get('login_url'):
+        problems.append("one of main_url or login_url is required")
+
+    xpaths = config.get('xpath')
+    if not isinstance(xpaths, dict):
+        return problems + ["xpath must be a dict of xpath selectors"]
+    for key in ['link_xpath', 'next_xpath']:
+        if key not in xpaths:
+            problems.append(f"xpath.{key} is required")
+    for key, xpath in xpaths.items():
+        try:
+            etree.XPath(xpath)
+        except (etree.XPathSyntaxError, TypeError) as e:
+            problems.append(f"xpath.{key} is not a valid xpath: {e}")
+    for key in config.get('ready_xpaths', []):
+        if key not in xpaths:
+            problems.append(f"ready_xpaths entry {key} is not in xpath")
+
+    choices = {
+        'extraction_mode': ['webdriver', 'script', 'lxml'],
+        'fetch_mode': ['browser', 'http'],
+        'page_load_strategy': PAGE_LOAD_STRATEGIES,
+        'output_format': sorted(set(FORMAT_EXTENSIONS.values()))
+    }
+    for key, allowed in choices.items():
+        if key in config and config[key] not in allowed:
+            problems.append(f"{key} must be one of {allowed}, got {config[key]!r}")
+
+    for key in ['wait_between', 'connection_delay']:
+        bounds = config.get(key)
+        if bounds is not None and (
+                not isinstance(bounds, list) or len(bounds) != 2 or not all(isinstance(b, (int, float)) for b in bounds)
+                or bounds[0] > bounds[1]):
+            problems.append(f"{key} must be [min, max] seconds, got {bounds!r}")
+
+    workers = config.get('workers')
+    if workers is not None and (not str(workers).isdigit() or int(workers) < 1):
+        problems.append(f"workers must be a positive number, got {workers!r}")
+    if config.get('replay') and not config.get('archive_path'):
+        problems.append("replay needs an archive_path")
+    return problems
+
+
 # function for converting string number to int
 def convert_str_to_number(x: str) -> list:
     try:
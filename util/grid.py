@@ -0,0 +1,93 @@
+from typing import (Callable, List)
+
+import threading
+import logging
+import time
+
+
+log = logging.getLogger(__name__)
+
+
+class GridNode(object):
+    def __init__(self, url: str, capacity: int = 1) -> None:
+        self.url = url
+        self.capacity = capacity
+        self.in_use = 0
+        self.down_until = 0.0
+
+    def __repr__(self) -> str:
+        return f"GridNode({self.url}, {self.in_use}/{self.capacity})"
+
+
+class Grid(object):
+    def __init__(self, endpoints: List[dict], cooldown: float = 60, acquire_timeout: float = 60) -> None:
+        """Selenium Grid endpoints (hubs or standalone nodes) sharing the crawl's browsers.
+
+        Browsers are placed on the least loaded node that is up and has a free
+        slot, a node never gets more browsers than its capacity. A node that
+        fails to start a browser or loses one is marked down for cooldown
+        seconds and its browsers are restarted on the other nodes, waiting for
+        a free slot when those are full.
+
+        Parameters
+        ----------
+        endpoints (Required) -- [{'url': 'http://host:4444/wd/hub', 'capacity': 4}, ...]
+        cooldown (Optional) -- seconds a failed node is left out
+        acquire_timeout (Optional) -- seconds to wait for a free slot when every node that is up is full
+
+        """
+        self.nodes = [GridNode(endpoint['url'], int(endpoint.get('capacity', 1))) for endpoint in endpoints]
+        self.cooldown = cooldown
+        self.acquire_timeout = acquire_timeout
+        self._lock = threading.Lock()
+        self._released = threading.Condition(self._lock)
+
+    @property
+    def capacity(self) -> int:
+        return sum(node.capacity for node in self.nodes)
+
+    # node with the most free slots among the nodes that are up, waits up to acquire_timeout for a free slot
+    def acquire(self, exclude: List[GridNode] = ()) -> GridNode:
+        deadline = time.monotonic() + self.acquire_timeout
+        with self._released:
+            while True:
+                now = time.monotonic()
+                up = [node for node in self.nodes if node.down_until <= now and node not in exclude]
+                if not up:
+                    raise RuntimeError("No Selenium Grid node is available")
+                free = [node for node in up if node.in_use < node.capacity]
+                if free:
+                    node = max(free, key=lambda node: (node.capacity - node.in_use) / node.capacity)
+                    node.in_use += 1
+                    return node
+                if now >= deadline:
+                    raise RuntimeError(f"Every Selenium Grid node that is up is full: {up}")
+                # re-checked every second too, a node coming back from its cooldown adds slots
+                self._released.wait(min(deadline - now, 1.0))
+
+    def release(self, node: GridNode) -> None:
+        with self._released:
+            node.in_use = max(node.in_use - 1, 0)
+            self._released.notify_all()
+
+    def mark_down(self, node: GridNode) -> None:
+        with self._lock:
+            node.down_until = time.monotonic() + self.cooldown
+        log.warning(f"Grid node {node.url} marked down for {self.cooldown}s")
+
+    # starts a browser with create(url) on the first node that accepts it
+    def start_driver(self, create: Callable[[str], object]):
+        tried = []
+        while True:
+            node = self.acquire(exclude=tried)
+            try:
+                driver = create(node.url)
+            except Exception as e:
+                log.error(f"Failed to start a browser on grid node {node.url}. Error: {e}")
+                self.release(node)
+                self.mark_down(node)
+                tried.append(node)
+                continue
+            driver.grid_node = node
+            log.info(f"Started browser on grid node {node.url}")
+            return driver
@@ -0,0 +1,74 @@
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import requests
+import logging
+import time
+
+
+log = logging.getLogger(__name__)
+
+DEFAULT_HEADERS = {
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-AU,en;q=0.9',
+    'Connection': 'keep-alive'
+}
+
+
+class HttpFetcher(object):
+    def __init__(self,
+                 user_agent: str = None,
+                 timeout: int = 30,
+                 pool_size: int = 10,
+                 max_retries: int = 2,
+                 headers: dict = None,
+                 proxy_pool=None) -> None:
+        """Browserless page fetcher over a pooled, keep-alive requests.Session.
+
+        Parameters
+        ----------
+        user_agent (Optional) -- User-Agent header sent with every request
+        timeout (Optional) -- connect/read timeout in seconds
+        pool_size (Optional) -- number of kept-alive connections per host
+        max_retries (Optional) -- retries on connection errors and 5xx responses
+        headers (Optional) -- extra headers merged over the defaults
+        proxy_pool (Optional) -- ProxyPool rotated per request, fed back with each request's outcome
+
+        """
+        self.timeout = timeout
+        self.proxy_pool = proxy_pool
+        self.session = requests.Session()
+
+        retries = Retry(
+            total=max_retries,
+            backoff_factor=0.5,
+            status_forcelist=[500, 502, 504]
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retries)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self.session.headers.update(DEFAULT_HEADERS)
+        if user_agent is not None:
+            self.session.headers['User-Agent'] = user_agent
+        if headers:
+            self.session.headers.update(headers)
+
+    def fetch(self, url: str) -> requests.Response:
+        if self.proxy_pool is None:
+            return self.session.get(url, timeout=self.timeout)
+
+        proxy = self.proxy_pool.choose()
+        proxies = {'http': f"http://{proxy}", 'https': f"http://{proxy}"} if proxy else None
+        start = time.monotonic()
+        try:
+            response = self.session.get(url, timeout=self.timeout, proxies=proxies)
+        except requests.RequestException:
+            self.proxy_pool.record(proxy, ok=False)
+            raise
+        # proxy errors and gateway failures count against the proxy, other statuses are the site's answer
+        self.proxy_pool.record(proxy, time.monotonic() - start, ok=response.status_code not in (407, 502, 503, 504))
+        return response
+
+    def close(self) -> None:
+        self.session.close()
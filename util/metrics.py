@@ -0,0 +1,227 @@
+from contextlib import (contextmanager, nullcontext)
+from collections import defaultdict
+from typing import (Dict, List)
+
+import threading
+import logging
+import bisect
+import json
+import time
+import os
+
+
+log = logging.getLogger(__name__)
+
+# upper bounds in seconds of the latency histogram buckets, the last bucket is +Inf
+LATENCY_BUCKETS = [0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60]
+
+# counters summed into the pages/minute throughput
+PAGE_COUNTERS = ['results_pages', 'detail_pages']
+
+
+class Histogram(object):
+    def __init__(self, buckets: List[float] = LATENCY_BUCKETS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    # upper bound of the bucket holding the q-th quantile
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank, seen = q * self.count, 0
+        for bound, count in zip(self.buckets + [float('inf')], self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+    def as_dict(self) -> dict:
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 6),
+            'mean': round(self.sum / self.count, 6) if self.count else 0.0,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99)
+        }
+
+
+# handler class of the stats endpoint. http.server is slow to import, so it is only loaded once an
+# endpoint is served
+def _metrics_handler():
+    from http.server import BaseHTTPRequestHandler
+
+    class _MetricsHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            if self.path == '/metrics':
+                body, content_type = self.server.metrics.render_prometheus(), 'text/plain; version=0.0.4'
+            elif self.path in ('/', '/stats'):
+                body, content_type = json.dumps(self.server.metrics.snapshot(), indent=4), 'application/json'
+            else:
+                self.send_error(404)
+                return
+            payload = body.encode('utf8')
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+    return _MetricsHandler
+
+
+class Metrics(object):
+    def __init__(self,
+                 snapshot_path: str = None,
+                 snapshot_interval: float = 30,
+                 port: int = None) -> None:
+        """Per-stage latency histograms, counters and throughput of a crawl.
+
+        Stages are timed with timer(stage) or observe(stage, seconds), events
+        counted with inc(counter). A background thread writes a JSON snapshot
+        to snapshot_path every snapshot_interval seconds, and with port set a
+        local HTTP endpoint serves /metrics (Prometheus text format) and /stats
+        (JSON). Thread-safe.
+
+        Parameters
+        ----------
+        snapshot_path (Optional) -- JSON file rewritten with every snapshot
+        snapshot_interval (Optional) -- seconds between two snapshots
+        port (Optional) -- port of the stats endpoint on 127.0.0.1, 0 picks a free one
+
+        """
+        self.snapshot_path = snapshot_path
+        self.snapshot_interval = snapshot_interval
+        self.port = port
+        self.started = time.time()
+
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Histogram] = defaultdict(Histogram)
+        self._counters: Dict[str, int] = defaultdict(int)
+        self._stop = threading.Event()
+        self._thread = None
+        self.server = None
+
+    def start(self) -> 'Metrics':
+        if self.snapshot_path is not None:
+            self._thread = threading.Thread(target=self._write_periodically, name="metrics-snapshot", daemon=True)
+            self._thread.start()
+        if self.port is not None:
+            from http.server import ThreadingHTTPServer
+            self.server = ThreadingHTTPServer(('127.0.0.1', self.port), _metrics_handler())
+            self.server.daemon_threads = True
+            self.server.metrics = self
+            self.port = self.server.server_address[1]
+            threading.Thread(target=self.server.serve_forever, name="metrics-endpoint", daemon=True).start()
+            log.info(f"Serving crawl metrics on http://127.0.0.1:{self.port}/metrics")
+        return self
+
+    def observe(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self._histograms[stage].observe(seconds)
+
+    @contextmanager
+    def timer(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def inc(self, counter: str, value: int = 1) -> None:
+        with self._lock:
+            self._counters[counter] += value
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            elapsed = time.time() - self.started
+            pages = sum(self._counters[counter] for counter in PAGE_COUNTERS)
+            return {
+                'timestamp': time.time(),
+                'elapsed_seconds': round(elapsed, 3),
+                'pages_per_minute': round(pages / elapsed * 60, 3) if elapsed else 0.0,
+                'counters': dict(self._counters),
+                'stages': {stage: histogram.as_dict() for stage, histogram in self._histograms.items()}
+            }
+
+    def render_prometheus(self) -> str:
+        lines = []
+        with self._lock:
+            elapsed = time.time() - self.started
+            pages = sum(self._counters[counter] for counter in PAGE_COUNTERS)
+
+            lines.append("# TYPE scraper_events_total counter")
+            for counter, value in sorted(self._counters.items()):
+                lines.append(f'scraper_events_total{{event="{counter}"}} {value}')
+
+            lines.append("# TYPE scraper_stage_seconds histogram")
+            for stage, histogram in sorted(self._histograms.items()):
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + ['+Inf'], histogram.counts):
+                    cumulative += count
+                    lines.append(f'scraper_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'scraper_stage_seconds_sum{{stage="{stage}"}} {histogram.sum}')
+                lines.append(f'scraper_stage_seconds_count{{stage="{stage}"}} {histogram.count}')
+
+        lines.append("# TYPE scraper_pages_per_minute gauge")
+        lines.append(f"scraper_pages_per_minute {pages / elapsed * 60 if elapsed else 0.0}")
+        return '\n'.join(lines) + '\n'
+
+    def write_snapshot(self) -> None:
+        tmp_path = f"{self.snapshot_path}.tmp"
+        with open(tmp_path, 'w', encoding="utf8") as f:
+            json.dump(self.snapshot(), f, indent=4)
+        os.replace(tmp_path, self.snapshot_path)
+
+    def _write_periodically(self) -> None:
+        while not self._stop.wait(self.snapshot_interval):
+            try:
+                self.write_snapshot()
+            except OSError as e:
+                log.warning(f"Failed writing metrics snapshot to {self.snapshot_path}. Error: {e}")
+
+    def close(self) -> None:
+        self._stop.set()
+        if self.snapshot_path is not None:
+            self.write_snapshot()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+        log.info(f"Crawl metrics: {json.dumps(self.snapshot())}")
+
+
+class NullMetrics(object):
+    """Metrics interface doing nothing, used when metrics are disabled."""
+
+    _timer = nullcontext()
+
+    def start(self) -> 'NullMetrics':
+        return self
+
+    def observe(self, stage: str, seconds: float) -> None:
+        pass
+
+    def timer(self, stage: str):
+        return self._timer
+
+    def inc(self, counter: str, value: int = 1) -> None:
+        pass
+
+    def snapshot(self) -> dict:
+        return {}
+
+    def close(self) -> None:
+        pass
+
+
+NULL_METRICS = NullMetrics()
@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+from typing import (List, Optional, Tuple)
+from functools import lru_cache
+
+import logging
+import re
+
+
+log = logging.getLogger(__name__)
+
+# numpy is imported by the functions vectorizing over it, so importing this module stays cheap
+
+# a number with an optional thousand/million suffix: '$1,250,000', '900k', '$1.35M', '1.2 million'
+PRICE_TOKEN = re.compile(
+    r'(\d[\d,]*(?:\.\d+)?)(?:\s*(k|m|thousand|mil|million)\b)?',
+    re.IGNORECASE
+)
+PRICE_MULTIPLIERS = {
+    None: 1,
+    'k': 1000,
+    'thousand': 1000,
+    'm': 1000000,
+    'mil': 1000000,
+    'million': 1000000
+}
+
+# a land size and its unit: '650m²', '1,200 sqm', '0.5 ha', '2 acres'. sizes are stored in m²
+SIZE_TOKEN = re.compile(
+    r'(\d[\d,]*(?:\.\d+)?)\s*(m²|m2|sqm|ha|hectares?|acres?)?',
+    re.IGNORECASE
+)
+SIZE_MULTIPLIERS = {
+    None: 1.0,
+    'm²': 1.0,
+    'm2': 1.0,
+    'sqm': 1.0,
+    'ha': 10000.0,
+    'hectare': 10000.0,
+    'hectares': 10000.0,
+    'acre': 4046.8564224,
+    'acres': 4046.8564224
+}
+
+# a distance and its unit: '1.2km', '450 m'. distances are stored in km
+DISTANCE_TOKEN = re.compile(r'(\d+(?:\.\d+)?)\s*(km|m)?\b', re.IGNORECASE)
+
+SOLD_ON = re.compile(r'Sold on ', re.IGNORECASE)
+
+# sale date formats used by realestate.com.au, day first: '12 Mar 2021', '12th March, 2021', '12/03/2021', '2021-03-12'
+DAY_MONTH_YEAR = re.compile(r'\b(\d{1,2})(?:st|nd|rd|th)?\s+([A-Za-z]{3,9})\.?,?\s+(\d{4})\b')
+MONTH_YEAR = re.compile(r'\b([A-Za-z]{3,9})\.?,?\s+(\d{4})\b')
+NUMERIC_DATE = re.compile(r'\b(\d{1,2})[/.-](\d{1,2})[/.-](\d{4}|\d{2})\b')
+ISO_DATE = re.compile(r'\b(\d{4})-(\d{1,2})-(\d{1,2})\b')
+
+MONTHS = {
+    'jan': 1, 'january': 1, 'feb': 2, 'february': 2, 'mar': 3, 'march': 3,
+    'apr': 4, 'april': 4, 'may': 5, 'jun': 6, 'june': 6, 'jul': 7, 'july': 7,
+    'aug': 8, 'august': 8, 'sep': 9, 'sept': 9, 'september': 9, 'oct': 10, 'october': 10,
+    'nov': 11, 'november': 11, 'dec': 12, 'december': 12
+}
+
+# prices below this are dates, times or feature counts picked up from the text, never a price
+MIN_PRICE = 10000
+
+COUNT_FIELDS = ['address_bedrooms', 'address_bathrooms', 'address_car_spaces']
+TEXT_FIELDS = ['address_property_type', 'address_description', 'address_full_address']
+
+
+# numbers found in every text as one flat float array, plus the number of tokens of each text.
+# findall keeps the per-text work in the regex engine, the per-token work is two list comprehensions
+def _tokenize(texts: List[Optional[str]], pattern, multipliers: dict, first_only: bool = False):
+    import numpy as np
+
+    found = [pattern.findall(text) if text else [] for text in texts]
+    if first_only:
+        found = [tokens[:1] for tokens in found]
+    tokens = [token for text_tokens in found for token in text_tokens]
+
+    numbers = np.asarray([number.replace(',', '') for number, unit in tokens], dtype=np.float64)
+    factors = np.asarray([multipliers[unit.lower() if unit else None] for number, unit in tokens], dtype=np.float64)
+    return numbers * factors, np.fromiter(map(len, found), dtype=np.int64, count=len(found))
+
+
+# per-text reduction of the flat token array, NaN for texts without tokens
+def _reduce(ufunc, values: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    import numpy as np
+
+    out = np.full(len(counts), np.nan)
+    nonempty = np.flatnonzero(counts)
+    if len(nonempty):
+        offsets = (np.cumsum(counts) - counts)[nonempty]
+        out[nonempty] = ufunc.reduceat(values, offsets)
+    return out
+
+
+# price text -> address_listing_price_high/low. texts without a usable price are kept as the high value
+def normalize_prices(texts: List[Optional[str]]) -> List[dict]:
+    import numpy as np
+
+    # listings of a batch repeat the same labels ('Contact Agent', 'Auction'), each distinct text is parsed once
+    distinct = list(dict.fromkeys(texts))
+    values, counts = _tokenize(distinct, PRICE_TOKEN, PRICE_MULTIPLIERS)
+    highs = np.rint(_reduce(np.maximum, values, counts)).tolist()
+    lows = np.rint(_reduce(np.minimum, values, counts)).tolist()
+
+    parsed = {}
+    for text, count, high, low in zip(distinct, counts.tolist(), highs, lows):
+        if text is None:
+            parsed[text] = {'address_listing_price_high': None, 'address_listing_price_low': None}
+        elif count == 0 or high < MIN_PRICE:
+            parsed[text] = {'address_listing_price_high': text, 'address_listing_price_low': None}
+        else:
+            parsed[text] = {
+                'address_listing_price_high': int(high),
+                'address_listing_price_low': int(low) if count > 1 and low > MIN_PRICE else None
+            }
+    return [dict(parsed[text]) for text in texts]
+
+
+# bedroom/bathroom/car space texts -> int counts, None when missing or not a number
+def normalize_counts(texts: List[Optional[str]]) -> List[Optional[int]]:
+    import numpy as np
+
+    cleaned = np.char.strip(np.char.replace(np.asarray([text or '' for text in texts], dtype=str), '"', ''))
+    valid = np.char.isdigit(cleaned)
+    counts = np.zeros(len(texts), dtype=np.int64)
+    if valid.any():
+        counts[valid] = cleaned[valid].astype(np.int64)
+    return [int(count) if ok else None for count, ok in zip(counts, valid)]
+
+
+# land size texts -> float m², None when missing
+def normalize_sizes(texts: List[Optional[str]]) -> List[Optional[float]]:
+    import numpy as np
+
+    values, counts = _tokenize(texts, SIZE_TOKEN, SIZE_MULTIPLIERS, first_only=True)
+    sizes = _reduce(np.add, values, counts)
+    return [None if np.isnan(size) else float(round(size, 2)) for size in sizes]
+
+
+# lists of school distance texts -> summed km per record
+def normalize_distances(distance_lists: List[List[str]]) -> List[float]:
+    import numpy as np
+
+    flat = [distance for distances in distance_lists for distance in (distances or [])]
+    values, counts = _tokenize(flat, DISTANCE_TOKEN, {None: 1.0, 'km': 1.0, 'm': 0.001}, first_only=True)
+    # texts without a number count as 0 km
+    per_text = np.zeros(len(flat))
+    per_text[counts > 0] = values
+    per_record = np.asarray([len(distances or []) for distances in distance_lists], dtype=np.int64)
+    sums = np.nan_to_num(_reduce(np.add, per_text, per_record))
+    return [round(float(total), 2) for total in sums]
+
+
+# fast path for the formats the site uses, None when the text is not one of them
+def _parse_known_sale_date(text: str) -> Optional[Tuple[int, int]]:
+    match = ISO_DATE.search(text)
+    if match:
+        year, month = int(match.group(1)), int(match.group(2))
+        return (year, month) if 1 <= month <= 12 else None
+
+    match = NUMERIC_DATE.search(text)
+    if match:
+        month, year = int(match.group(2)), int(match.group(3))
+        year = year + 2000 if year < 100 else year
+        return (year, month) if 1 <= month <= 12 else None
+
+    for match in DAY_MONTH_YEAR.finditer(text):
+        month = MONTHS.get(match.group(2).lower())
+        if month is not None:
+            return int(match.group(3)), month
+
+    for match in MONTH_YEAR.finditer(text):
+        month = MONTHS.get(match.group(1).lower())
+        if month is not None:
+            return int(match.group(2)), month
+
+    return None
+
+
+# 'Sold on …' text -> (year, month) in a single parse. memoized, as many listings share a sale date.
+# dateparser is only imported and used for texts the fast path does not recognize
+@lru_cache(maxsize=4096)
+def parse_sale_date(text: str) -> Tuple[Optional[int], Optional[int]]:
+    text = SOLD_ON.sub('', text).strip()
+    parsed = _parse_known_sale_date(text)
+    if parsed is not None:
+        return parsed
+
+    import dateparser
+    sold_date = dateparser.parse(text, settings={'DATE_ORDER': 'DMY'})
+    if sold_date is None:
+        log.warning(f"Unable to parse sale date {text!r}")
+        return None, None
+    return sold_date.year, sold_date.month
+
+
+def normalize_sale_dates(texts: List[Optional[str]]) -> List[tuple]:
+    return [parse_sale_date(text) if text is not None else (None, None) for text in texts]
+
+
+# normalization stage: converts a batch of raw extracted records into listing records.
+# raw keys other than the content fields (e.g. address_url) are passed through first
+def normalize_records(raws: List[dict]) -> List[dict]:
+    if not raws:
+        return []
+
+    prices = normalize_prices([raw.get('address_listing_price') for raw in raws])
+    counts = {field: normalize_counts([raw.get(field) for raw in raws]) for field in COUNT_FIELDS}
+    sizes = normalize_sizes([raw.get('property_size') for raw in raws])
+    distances = normalize_distances([raw.get('property_distance_from_schools_aggregate') for raw in raws])
+    dates = normalize_sale_dates([raw.get('date') for raw in raws])
+
+    records = []
+    for i, raw in enumerate(raws):
+        data = {key: value for key, value in raw.items() if key == 'address_url'}
+        data.update(prices[i])
+        for field in COUNT_FIELDS:
+            data[field] = counts[field][i]
+        for field in TEXT_FIELDS:
+            data[field] = raw.get(field)
+        data['property_size'] = sizes[i]
+        data['property_distance_from_schools_aggregate'] = distances[i]
+        data['year_sold'], data['month_sold'] = dates[i]
+        records.append(data)
+    return records
+
+
+# single-record convenience wrapper around the batch normalization stage
+def parse_record(raw: dict) -> dict:
+    return normalize_records([raw])[0]
@@ -0,0 +1,114 @@
+from selenium.webdriver.firefox.firefox_profile import FirefoxProfile
+from typing import (Dict, List)
+
+import threading
+import tempfile
+import hashlib
+import logging
+import shutil
+import json
+import os
+
+
+log = logging.getLogger(__name__)
+
+
+class CachedFirefoxProfile(FirefoxProfile):
+    def __init__(self, encoded: str) -> None:
+        # an empty temp dir, removed by the driver on quit. the profile itself is the prebuilt zip
+        super(CachedFirefoxProfile, self).__init__()
+        self._encoded = encoded
+
+    # selenium zips and base64-encodes the profile dir on every launch, the cached string is reused instead
+    @property
+    def encoded(self) -> str:
+        return self._encoded
+
+
+class ProfileCache(object):
+    def __init__(self, cache_dir: str = None) -> None:
+        """Builds each distinct Firefox profile once and reuses it for every later launch.
+
+        A profile is keyed by its preferences, extensions and user agent. The
+        first launch builds it in a template directory under cache_dir and
+        stores the zipped, encoded profile next to it. Later launches, in this
+        run or the next ones, hand that encoded profile to geckodriver as is.
+
+        Parameters
+        ----------
+        cache_dir (Optional) -- directory holding the templates, a temp dir for this run by default
+
+        """
+        # a temp dir of this run is removed by close(), a given cache_dir is kept for the next runs
+        self._owns_dir = cache_dir is None
+        self.cache_dir = cache_dir or tempfile.mkdtemp(prefix="profile-cache-")
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._encoded: Dict[str, str] = {}
+
+    @staticmethod
+    def key(preferences: dict, extensions: List[str] = (), user_agent: str = None) -> str:
+        # extension files are keyed by content, so an updated .xpi gives a new profile
+        digests = []
+        for extension in extensions:
+            with open(extension, 'rb') as f:
+                digests.append(hashlib.sha1(f.read()).hexdigest())
+        payload = json.dumps(
+            {'preferences': preferences, 'extensions': digests, 'user_agent': user_agent},
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha1(payload.encode('utf8')).hexdigest()[:16]
+
+    def _build(self, template: str, preferences: dict, extensions: List[str], user_agent: str) -> str:
+        profile = FirefoxProfile()
+        try:
+            if user_agent is not None:
+                profile.set_preference('general.useragent.override', user_agent)
+            for key, value in preferences.items():
+                profile.set_preference(key, value)
+            for extension in extensions:
+                profile.add_extension(extension)
+            encoded = profile.encoded
+
+            # template dir first, the encoded file marks the entry as complete
+            if os.path.exists(template):
+                shutil.rmtree(template)
+            shutil.copytree(profile.path, template)
+        finally:
+            shutil.rmtree(profile.path, ignore_errors=True)
+        return encoded
+
+    def get(self, preferences: dict, extensions: List[str] = (), user_agent: str = None) -> CachedFirefoxProfile:
+        key = self.key(preferences, extensions, user_agent)
+        with self._lock:
+            encoded = self._encoded.get(key)
+            if encoded is None:
+                template = os.path.join(self.cache_dir, key)
+                encoded_path = f"{template}.b64"
+                if os.path.exists(encoded_path):
+                    with open(encoded_path, encoding='utf8') as f:
+                        encoded = f.read()
+                    log.debug(f"Reusing cached profile {key}")
+                elif os.path.isdir(template):
+                    # template without its zip (e.g. interrupted run): zip it once more
+                    profile = FirefoxProfile(template)
+                    encoded = profile.encoded
+                    shutil.rmtree(profile.tempfolder, ignore_errors=True)
+                else:
+                    encoded = self._build(template, preferences, list(extensions), user_agent)
+                    log.info(f"Built browser profile {key} in {template}")
+
+                if not os.path.exists(encoded_path):
+                    with open(f"{encoded_path}.tmp", 'w', encoding='utf8') as f:
+                        f.write(encoded)
+                    os.replace(f"{encoded_path}.tmp", encoded_path)
+                self._encoded[key] = encoded
+
+        return CachedFirefoxProfile(encoded)
+
+    def close(self) -> None:
+        with self._lock:
+            self._encoded = {}
+            if self._owns_dir:
+                shutil.rmtree(self.cache_dir, ignore_errors=True)
@@ -0,0 +1,187 @@
+from typing import (Callable, Dict, List, Optional)
+
+import threading
+import logging
+import random
+import json
+import time
+import os
+
+
+log = logging.getLogger(__name__)
+
+# latency assumed for proxies without a successful request
+DEFAULT_LATENCY = 2.0
+
+# latencies below this score the same, so one fast proxy does not take all the traffic
+MIN_LATENCY = 0.25
+
+
+class ProxyHealth(object):
+    def __init__(self, address: str) -> None:
+        self.address = address
+        self.latency: Optional[float] = None
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+
+    # smoothed success rate, 0.5 for an untried proxy
+    @property
+    def success_rate(self) -> float:
+        return (self.successes + 1) / (self.successes + self.failures + 2)
+
+    @property
+    def score(self) -> float:
+        return self.success_rate / max(self.latency if self.latency is not None else DEFAULT_LATENCY, MIN_LATENCY)
+
+    def as_dict(self) -> dict:
+        return {
+            'latency': self.latency,
+            'successes': self.successes,
+            'failures': self.failures,
+            'ejected': self.open_until > time.monotonic()
+        }
+
+
+class ProxyPool(object):
+    def __init__(self,
+                 source: Callable[[], List[str]],
+                 cache_path: str = None,
+                 ttl: float = 3600,
+                 ewma_alpha: float = 0.3,
+                 failure_threshold: int = 3,
+                 cooldown: float = 300) -> None:
+        """Health-scored pool of 'ip:port' proxies.
+
+        The proxy list comes from source and is cached on disk for ttl
+        seconds. Every request through a proxy is fed back with record(), which
+        keeps an EWMA of its latency and its success rate. choose() picks a
+        proxy at random weighted by success rate / latency. After
+        failure_threshold consecutive failures a proxy's circuit opens and it
+        is left out for cooldown seconds, after which it gets one trial request
+        again. Thread-safe, one instance is shared by all drivers and fetchers.
+
+        Parameters
+        ----------
+        source (Required) -- callable returning a fresh list of 'ip:port' proxies, e.g. gen_util.get_proxies
+        cache_path (Optional) -- JSON file the proxy list is cached in
+        ttl (Optional) -- seconds the cached list is used before source is called again
+        ewma_alpha (Optional) -- weight of the newest latency sample
+        failure_threshold (Optional) -- consecutive failures ejecting a proxy
+        cooldown (Optional) -- seconds an ejected proxy is left out
+
+        """
+        self.source = source
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self.ewma_alpha = ewma_alpha
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+
+        self._lock = threading.Lock()
+        self._proxies: Dict[str, ProxyHealth] = {}
+        self._loaded_at = 0.0
+        self.load()
+
+    def _read_cache(self) -> Optional[List[str]]:
+        if self.cache_path is None or not os.path.exists(self.cache_path):
+            return None
+        try:
+            with open(self.cache_path, encoding="utf8") as f:
+                cached = json.load(f)
+        except (OSError, ValueError) as e:
+            log.warning(f"Ignoring unreadable proxy cache {self.cache_path}. Error: {e}")
+            return None
+        if time.time() - cached.get('fetched_at', 0) > self.ttl:
+            return None
+        return cached.get('proxies') or None
+
+    def _write_cache(self, proxies: List[str]) -> None:
+        if self.cache_path is None:
+            return
+        tmp_path = f"{self.cache_path}.tmp"
+        with open(tmp_path, 'w', encoding="utf8") as f:
+            json.dump({'fetched_at': time.time(), 'proxies': proxies}, f, indent=4)
+        os.replace(tmp_path, self.cache_path)
+
+    # (re)load the proxy list from the cache or the source, keeping the health of known proxies
+    def load(self, force: bool = False) -> None:
+        proxies = None if force else self._read_cache()
+        if proxies is None:
+            proxies = list(self.source())
+            self._write_cache(proxies)
+            log.info(f"Fetched {len(proxies)} proxies")
+        else:
+            log.info(f"Using {len(proxies)} cached proxies from {self.cache_path}")
+
+        with self._lock:
+            self._proxies = {address: self._proxies.get(address) or ProxyHealth(address) for address in proxies}
+            self._loaded_at = time.monotonic()
+
+    def choose(self, exclude: List[str] = ()) -> Optional[str]:
+        if time.monotonic() - self._loaded_at > self.ttl:
+            self.load()
+
+        with self._lock:
+            now = time.monotonic()
+            candidates = [
+                health for address, health in self._proxies.items()
+                if health.open_until <= now and address not in exclude
+            ]
+            if not candidates:
+                # every circuit is open: try the one closest to its cooldown end
+                ejected = [health for address, health in self._proxies.items() if address not in exclude]
+                if not ejected:
+                    return None
+                return min(ejected, key=lambda health: health.open_until).address
+
+            # every proxy gets measured before the scores decide
+            untried = [health for health in candidates if health.successes + health.failures == 0]
+            if untried:
+                return random.choice(untried).address
+
+            weights = [health.score for health in candidates]
+            return random.choices(candidates, weights=weights)[0].address
+
+    def record(self, address: str, latency: float = None, ok: bool = True) -> None:
+        with self._lock:
+            health = self._proxies.get(address)
+            if health is None:
+                return
+            if ok:
+                health.successes += 1
+                health.consecutive_failures = 0
+                health.open_until = 0.0
+                if latency is not None:
+                    health.latency = latency if health.latency is None else (
+                        self.ewma_alpha * latency + (1 - self.ewma_alpha) * health.latency
+                    )
+            else:
+                health.failures += 1
+                health.consecutive_failures += 1
+                if health.consecutive_failures >= self.failure_threshold:
+                    health.open_until = time.monotonic() + self.cooldown
+                    log.info(f"Ejecting proxy {address} for {self.cooldown}s after "
+                             f"{health.consecutive_failures} consecutive failures")
+
+    # one request through every proxy to seed their health before the crawl
+    def probe(self, url: str, timeout: float = 10) -> None:
+        import requests
+
+        for address in list(self._proxies):
+            start = time.monotonic()
+            try:
+                response = requests.get(
+                    url, proxies={'http': f"http://{address}", 'https': f"http://{address}"}, timeout=timeout
+                )
+                self.record(address, time.monotonic() - start, ok=response.ok)
+            except requests.RequestException:
+                self.record(address, ok=False)
+
+    def stats(self) -> Dict[str, dict]:
+        with self._lock:
+            return {address: health.as_dict() for address, health in self._proxies.items()}
+
+    def __len__(self) -> int:
+        return len(self._proxies)
@@ -0,0 +1,143 @@
+from collections import defaultdict
+from typing import (List, Optional)
+
+import threading
+import logging
+import time
+
+
+log = logging.getLogger(__name__)
+
+# statuses telling us to slow down
+THROTTLE_STATUSES = {429, 503}
+
+# default floor in requests per second, one request every 20s
+DEFAULT_MIN_RATE = 0.05
+
+# texts of block/challenge pages served instead of the content
+DEFAULT_BLOCK_MARKERS = [
+    'captcha',
+    'access denied',
+    'unusual traffic',
+    'pardon our interruption',
+    'request unsuccessful'
+]
+
+
+class TokenBucket(object):
+    def __init__(self, rate: float, burst: float = 1) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    # takes a token and returns the seconds to wait for it. tokens may go negative,
+    # which queues concurrent callers one interval apart
+    def reserve(self) -> float:
+        now = time.monotonic()
+        if self.rate == float('inf'):
+            return max(0.0, self.paused_until - now)
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        return max(wait, self.paused_until - now)
+
+
+class AdaptiveRateLimiter(object):
+    def __init__(self,
+                 initial_rate: float,
+                 min_rate: float = DEFAULT_MIN_RATE,
+                 max_rate: float = float('inf'),
+                 burst: float = 1,
+                 increase: float = 0.05,
+                 decrease: float = 0.5,
+                 target_latency: float = None,
+                 block_markers: List[str] = None) -> None:
+        """Per-host token-bucket rate limiter adapting its rate to the server (AIMD).
+
+        Every successful response below the target latency raises the host's
+        rate additively. A throttling status (429/503), a block page, a slow
+        response or a failed request (connection error, timeout, retries
+        exhausted) cuts it multiplicatively. The rate is always kept within
+        [min_rate, max_rate], and an unlimited host is throttled down from one
+        request per response time. One instance is thread-safe and is shared by all
+        workers of a run.
+
+        Parameters
+        ----------
+        initial_rate (Required) -- starting requests per second for every host, inf for no limit
+        min_rate (Optional) -- floor in requests per second
+        max_rate (Optional) -- ceiling in requests per second, unbounded by default
+        burst (Optional) -- requests allowed back to back after an idle period
+        increase (Optional) -- requests per second added after each good response
+        decrease (Optional) -- factor the rate is multiplied by on throttling
+        target_latency (Optional) -- seconds above which a response counts as the server struggling
+        block_markers (Optional) -- lowercase texts identifying a block page
+
+        """
+        self.initial_rate = min(max(initial_rate, min_rate), max_rate)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.increase = increase
+        self.decrease = decrease
+        self.target_latency = target_latency
+        self.block_markers = [marker.lower() for marker in (block_markers or DEFAULT_BLOCK_MARKERS)]
+
+        self._lock = threading.Lock()
+        self._buckets = defaultdict(lambda: TokenBucket(self.initial_rate, self.burst))
+
+    @classmethod
+    def from_config(cls, config: dict, wait_between: list) -> 'AdaptiveRateLimiter':
+        # wait_between only sets the starting rate (its mean sleep, no limit for [0, 0]). the rate then
+        # adapts between DEFAULT_MIN_RATE and no ceiling unless min_rate/max_rate are configured
+        a, b = wait_between
+        settings = {'initial_rate': 2.0 / (a + b) if a + b else float('inf')}
+        settings.update(config or {})
+        return cls(**settings)
+
+    def reserve(self, host: str) -> float:
+        with self._lock:
+            return self._buckets[host].reserve()
+
+    # block until the next request to host is allowed, returns the seconds waited
+    def acquire(self, host: str) -> float:
+        wait = self.reserve(host)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def is_block_page(self, text: str) -> bool:
+        text = (text or '').lower()
+        return any(marker in text for marker in self.block_markers)
+
+    # feed back the outcome of a request to host
+    def record(self,
+               host: str,
+               latency: float,
+               status: int = None,
+               blocked: bool = False,
+               retry_after: Optional[float] = None,
+               failed: bool = False) -> None:
+        with self._lock:
+            bucket = self._buckets[host]
+            throttled = (
+                failed or blocked or status in THROTTLE_STATUSES
+                or (self.target_latency is not None and latency > self.target_latency)
+            )
+            if throttled:
+                # an unlimited host has no rate to cut yet, it starts from one request per response time
+                rate = bucket.rate if bucket.rate != float('inf') else 1.0 / max(latency, 0.01)
+                bucket.rate = max(self.min_rate, rate * self.decrease)
+                if retry_after:
+                    bucket.paused_until = time.monotonic() + retry_after
+                log.info(f"Throttled by {host} (status {status}, blocked {blocked}, failed {failed}, {latency:.2f}s). "
+                         f"Rate now {bucket.rate:.3f} req/s")
+            else:
+                bucket.rate = min(self.max_rate, bucket.rate + self.increase)
+
+    def rate(self, host: str) -> float:
+        with self._lock:
+            return self._buckets[host].rate
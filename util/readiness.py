@@ -0,0 +1,81 @@
+from selenium.common.exceptions import (TimeoutException, WebDriverException)
+from typing import List
+
+import logging
+import time
+
+
+log = logging.getLogger(__name__)
+
+PAGE_LOAD_STRATEGIES = ['normal', 'eager', 'none']
+
+# true when every xpath of arguments[0] matches a node
+XPATHS_PRESENT_SCRIPT = """
+var xpaths = arguments[0];
+for (var i = 0; i < xpaths.length; i++) {
+    if (!document.evaluate(xpaths[i], document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue) {
+        return false;
+    }
+}
+return true;
+"""
+
+# resolves as soon as every xpath of arguments[0] matches, driven by a MutationObserver
+# instead of polling. resolves false after arguments[1] milliseconds
+XPATHS_OBSERVER_SCRIPT = """
+var xpaths = arguments[0], timeout = arguments[1], done = arguments[arguments.length - 1];
+function ready() {
+    for (var i = 0; i < xpaths.length; i++) {
+        if (!document.evaluate(xpaths[i], document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue) {
+            return false;
+        }
+    }
+    return true;
+}
+if (ready()) {
+    done(true);
+    return;
+}
+var observer = new MutationObserver(function () {
+    if (ready()) {
+        observer.disconnect();
+        clearTimeout(timer);
+        done(true);
+    }
+});
+var timer = setTimeout(function () {
+    observer.disconnect();
+    done(false);
+}, timeout);
+observer.observe(document.documentElement || document, {childList: true, subtree: true});
+"""
+
+
+# wait until every xpath is present in the page. one MutationObserver round trip when possible,
+# short-interval polling otherwise. returns False on timeout instead of raising
+def wait_for_xpaths(driver,
+                    xpaths: List[str],
+                    timeout: float = 10,
+                    poll_interval: float = 0.05,
+                    use_observer: bool = True) -> bool:
+    if not xpaths:
+        return True
+
+    deadline = time.monotonic() + timeout
+    if use_observer:
+        try:
+            return bool(driver.execute_async_script(XPATHS_OBSERVER_SCRIPT, xpaths, int(timeout * 1000)))
+        except WebDriverException as e:
+            # e.g. no document yet, or the driver's script timeout (TimeoutException) is shorter than
+            # timeout: the observer resolves false itself, so poll for the time that is left
+            log.debug(f"MutationObserver wait failed, polling instead. Error: {e}")
+
+    # selenium.webdriver is slow to import and only needed by the polling fallback
+    from selenium.webdriver.support.ui import WebDriverWait
+    try:
+        WebDriverWait(driver, max(deadline - time.monotonic(), 0), poll_frequency=poll_interval).until(
+            lambda d: d.execute_script(XPATHS_PRESENT_SCRIPT, xpaths)
+        )
+        return True
+    except TimeoutException:
+        return False
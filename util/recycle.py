@@ -0,0 +1,218 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import (Callable, Dict, List, Optional)
+
+import threading
+import logging
+import time
+import os
+
+
+log = logging.getLogger(__name__)
+
+
+def _proc_children(pid: int) -> List[int]:
+    children = []
+    try:
+        for task in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{task}/children") as f:
+                children.extend(int(child) for child in f.read().split())
+    except OSError:
+        pass
+    return children
+
+
+def _proc_rss(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+# resident memory in bytes of a process and all its descendants. uses psutil when installed,
+# /proc otherwise. None when neither is available
+def process_tree_rss(pid: int) -> Optional[int]:
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+
+    if psutil is not None:
+        try:
+            process = psutil.Process(pid)
+            total = 0
+            for member in [process] + process.children(recursive=True):
+                try:
+                    total += member.memory_info().rss
+                except psutil.Error:
+                    pass
+            return total
+        except psutil.Error:
+            return None
+
+    if not os.path.isdir(f"/proc/{pid}"):
+        return None
+    total, pending = 0, [pid]
+    while pending:
+        current = pending.pop()
+        total += _proc_rss(current)
+        pending.extend(_proc_children(current))
+    return total
+
+
+# pid of the geckodriver process, firefox and its content processes are its descendants
+def driver_pid(driver) -> Optional[int]:
+    try:
+        return driver.service.process.pid
+    except AttributeError:
+        return None
+
+
+class _DriverState(object):
+    def __init__(self) -> None:
+        self.started = time.monotonic()
+        self.pages = 0
+        self.rss: Optional[int] = None
+        self.replacement = None
+        self.url: Optional[str] = None
+        self.cookies: List[dict] = []
+
+
+class BrowserRecycler(object):
+    def __init__(self,
+                 factory: Callable[[object, list, str], object],
+                 max_pages: int = None,
+                 max_minutes: float = None,
+                 max_rss_mb: float = None,
+                 prewarm_at: float = 0.8,
+                 check_every: int = 10) -> None:
+        """Restarts browsers after N pages, M minutes or above a memory threshold.
+
+        Drivers report every page load with page_loaded(). Once a driver
+        reaches prewarm_at of any limit its replacement is started in a
+        background thread, so when the limit is hit the swap in
+        maybe_recycle() only waits for a browser that is already up. The
+        replacement is built by factory(old_driver, cookies, url), which must
+        reuse the old driver's proxy and user agent and restore the cookies;
+        the old browser is quit in the background. At the swap the replacement
+        is moved on to the page the old driver reached since the pre-warm, with
+        the cookies set meanwhile.
+
+        Parameters
+        ----------
+        factory (Required) -- builds the replacement of a driver, from the pre-warm thread
+        max_pages (Optional) -- page loads before a browser is recycled
+        max_minutes (Optional) -- minutes before a browser is recycled
+        max_rss_mb (Optional) -- memory of the browser process tree, in MB, above which it is recycled
+        prewarm_at (Optional) -- fraction of a limit at which the replacement starts
+        check_every (Optional) -- page loads between two memory readings
+
+        """
+        self.factory = factory
+        self.max_pages = max_pages
+        self.max_seconds = max_minutes * 60 if max_minutes else None
+        self.max_rss = max_rss_mb * 1024 * 1024 if max_rss_mb else None
+        self.prewarm_at = prewarm_at
+        self.check_every = check_every
+
+        self._lock = threading.Lock()
+        self._states: Dict[int, _DriverState] = {}
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="browser-prewarm")
+
+    def _state(self, driver) -> _DriverState:
+        with self._lock:
+            return self._states.setdefault(id(driver), _DriverState())
+
+    def page_loaded(self, driver) -> None:
+        state = self._state(driver)
+        state.pages += 1
+        if self.max_rss is not None and state.pages % self.check_every == 0:
+            pid = driver_pid(driver)
+            state.rss = process_tree_rss(pid) if pid is not None else None
+
+    # highest fraction of any configured limit used by the driver
+    def _usage(self, state: _DriverState) -> float:
+        usage = 0.0
+        if self.max_pages:
+            usage = max(usage, state.pages / self.max_pages)
+        if self.max_seconds:
+            usage = max(usage, (time.monotonic() - state.started) / self.max_seconds)
+        if self.max_rss and state.rss is not None:
+            usage = max(usage, state.rss / self.max_rss)
+        return usage
+
+    # call from the driver's own thread between two tasks. returns the driver to keep using,
+    # a fresh one at the same url with the same cookies once a limit is reached
+    def maybe_recycle(self, driver, url: str = None):
+        state = self._state(driver)
+        usage = self._usage(state)
+        if usage < self.prewarm_at:
+            return driver
+
+        if state.replacement is None:
+            # cookies and url are read here, webdriver commands must stay on the driver's thread
+            state.url, state.cookies = url or driver.current_url, driver.get_cookies()
+            state.replacement = self._executor.submit(self.factory, driver, state.cookies, state.url)
+            log.info(f"Pre-warming a replacement browser ({state.pages} pages, "
+                     f"{(time.monotonic() - state.started) / 60:.1f} min, rss {state.rss})")
+        if usage < 1.0:
+            return driver
+
+        try:
+            replacement = state.replacement.result()
+        except Exception as e:
+            log.error(f"Failed to start a replacement browser, keeping the old one. Error: {e}")
+            state.replacement = None
+            state.started, state.pages = time.monotonic(), 0
+            return driver
+
+        # the old driver kept crawling while the replacement started up
+        try:
+            self._catch_up(replacement, driver.get_cookies(), url or driver.current_url, state)
+        except Exception as e:
+            log.error(f"Failed to move the replacement browser to the current page, keeping the old one. Error: {e}")
+            self._executor.submit(self._quit, replacement)
+            state.replacement = None
+            state.started, state.pages = time.monotonic(), 0
+            return driver
+
+        with self._lock:
+            self._states.pop(id(driver), None)
+        self._executor.submit(self._quit, driver)
+        log.info(f"Recycled browser after {state.pages} pages")
+        return replacement
+
+    # moves the replacement to the old driver's latest url and cookies, when they changed since the pre-warm
+    @staticmethod
+    def _catch_up(replacement, cookies: List[dict], url: str, state: _DriverState) -> None:
+        known = {(cookie.get('name'), cookie.get('value')) for cookie in state.cookies}
+        changed = [cookie for cookie in cookies if (cookie.get('name'), cookie.get('value')) not in known]
+        if url == state.url and not changed:
+            return
+        for cookie in changed:
+            try:
+                replacement.add_cookie(cookie)
+            except Exception as e:
+                log.debug(f"Could not restore cookie {cookie.get('name')}. Error: {e}")
+        replacement.get(url)
+
+    def _quit(self, driver) -> None:
+        try:
+            driver.quit()
+        except Exception as e:
+            log.warning(f"Error quitting recycled browser. Error: {e}")
+
+    def close(self) -> None:
+        with self._lock:
+            pending = [state.replacement for state in self._states.values() if state.replacement is not None]
+            self._states = {}
+        for future in pending:
+            if not future.cancel():
+                try:
+                    self._quit(future.result())
+                except Exception:
+                    pass
+        self._executor.shutdown(wait=True)
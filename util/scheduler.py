@@ -0,0 +1,134 @@
+from typing import (Callable, Dict, List)
+
+import itertools
+import threading
+import logging
+import queue
+import json
+
+
+log = logging.getLogger(__name__)
+
+
+class Job(object):
+    _sequence = itertools.count()
+
+    def __init__(self,
+                 config: str,
+                 keyword: str = None,
+                 max_pages: int = None,
+                 priority: int = 0,
+                 output: str = None,
+                 overrides: dict = None) -> None:
+        self.config = config
+        self.keyword = keyword
+        self.max_pages = max_pages
+        self.priority = priority
+        self.output = output
+        self.overrides = overrides or {}
+        self.order = next(Job._sequence)
+
+    @property
+    def name(self) -> str:
+        return f"{self.config}:{self.keyword}" if self.keyword else self.config
+
+    # higher priority first, then in submission order
+    def __lt__(self, other: 'Job') -> bool:
+        return (-self.priority, self.order) < (-other.priority, other.order)
+
+
+# jobs from a JSON list or a JSON-lines file of {config, keyword, max_pages, priority, output, overrides}
+def load_jobs(path: str) -> List[Job]:
+    with open(path, encoding="utf8") as f:
+        text = f.read().strip()
+    entries = json.loads(text) if text.startswith('[') else [json.loads(line) for line in text.splitlines() if line.strip()]
+    return [Job(**entry) for entry in entries]
+
+
+class JobScheduler(object):
+    def __init__(self,
+                 run_job: Callable[[Job, object], None],
+                 open_session: Callable[[str], object],
+                 close_session: Callable[[object], None],
+                 concurrency: int = 2) -> None:
+        """Runs many scrape jobs over a fixed set of warm browser/http sessions.
+
+        Jobs are taken from a priority queue by concurrency worker threads.
+        Each worker keeps one session per config, opened by open_session(config)
+        the first time it runs a job of that config and reused by all its later
+        jobs of that config, so browsers start and log in once per worker
+        instead of once per job. Sessions are closed once the queue is empty.
+
+        Parameters
+        ----------
+        run_job (Required) -- called with (job, session) from a worker thread
+        open_session (Required) -- called with a config name, returns a warm session
+        close_session (Required) -- called with every session when the scheduler is done
+        concurrency (Optional) -- number of jobs running at the same time
+
+        """
+        self.run_job = run_job
+        self.open_session = open_session
+        self.close_session = close_session
+        self.concurrency = concurrency
+
+        self.jobs = queue.PriorityQueue()
+        self.results: Dict[str, str] = {}
+        self._sessions: List[object] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def submit(self, job: Job) -> None:
+        self.jobs.put(job)
+
+    def _worker(self, index: int) -> None:
+        sessions = {}
+        while not self._stop.is_set():
+            try:
+                job = self.jobs.get_nowait()
+            except queue.Empty:
+                return
+
+            try:
+                if job.config not in sessions:
+                    sessions[job.config] = self.open_session(job.config)
+                    with self._lock:
+                        self._sessions.append(sessions[job.config])
+                log.info(f"Worker {index} running job {job.name} (priority {job.priority})")
+                self.run_job(job, sessions[job.config])
+                status = 'done'
+            except Exception as e:
+                log.error(f"Job {job.name} failed. Error: {e}")
+                status = f"failed: {e}"
+            finally:
+                self.jobs.task_done()
+
+            with self._lock:
+                self.results[job.name] = status
+
+    # runs every queued job and returns {job name: 'done' | 'failed: <error>'}
+    def run(self) -> Dict[str, str]:
+        threads = [
+            threading.Thread(target=self._worker, args=(index,), name=f"job-worker-{index}", daemon=True)
+            for index in range(min(self.concurrency, self.jobs.qsize()))
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            # polls so Ctrl-C is never swallowed by a join
+            while any(thread.is_alive() for thread in threads):
+                for thread in threads:
+                    thread.join(timeout=0.2)
+        finally:
+            self.close()
+        return self.results
+
+    def close(self) -> None:
+        self._stop.set()
+        with self._lock:
+            sessions, self._sessions = self._sessions, []
+        for session in sessions:
+            try:
+                self.close_session(session)
+            except Exception as e:
+                log.warning(f"Error closing session. Error: {e}")
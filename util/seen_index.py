@@ -0,0 +1,81 @@
+from typing import (List, Iterable)
+
+import threading
+import hashlib
+import sqlite3
+import logging
+import time
+import json
+
+
+log = logging.getLogger(__name__)
+
+
+class SeenIndex(object):
+    def __init__(self, path: str) -> None:
+        """Persistent index of scraped listings, shared across runs.
+
+        Keyed on address_url, it records when each listing was last scraped
+        and a hash of its extracted fields, so fresh listings can be skipped
+        before any detail-page fetch.
+
+        Parameters
+        ----------
+        path (Required) -- path of the SQLite index file
+
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS seen (
+                address_url TEXT PRIMARY KEY,
+                scraped_at REAL,
+                fields_hash TEXT
+            );
+            CREATE INDEX IF NOT EXISTS seen_scraped_at ON seen (scraped_at);
+        """)
+        self.conn.commit()
+
+    @staticmethod
+    def fields_hash(data: dict) -> str:
+        fields = {k: v for k, v in data.items() if k != 'address_url'}
+        return hashlib.sha1(json.dumps(fields, sort_keys=True, default=str).encode('utf8')).hexdigest()
+
+    # urls scraped within the last max_age seconds
+    def fresh(self, urls: List[str], max_age: float) -> set:
+        if not urls:
+            return set()
+        with self._lock:
+            return {
+                row[0] for row in self.conn.execute(
+                    f"SELECT address_url FROM seen WHERE scraped_at >= ? "
+                    f"AND address_url IN ({','.join('?' * len(urls))})",
+                    [time.time() - max_age] + list(urls)
+                )
+            }
+
+    # stores the scrape under every given url (e.g. the link and the redirected address_url).
+    # returns True when the extracted fields changed since the last scrape
+    def record(self, urls: Iterable[str], data: dict) -> bool:
+        digest = self.fields_hash(data)
+        now = time.time()
+        urls = list(dict.fromkeys(url for url in urls if url))
+        with self._lock:
+            previous = {
+                row[0] for row in self.conn.execute(
+                    f"SELECT fields_hash FROM seen WHERE address_url IN ({','.join('?' * len(urls))})", urls
+                )
+            }
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO seen (address_url, scraped_at, fields_hash) VALUES (?, ?, ?)",
+                [(url, now, digest) for url in urls]
+            )
+            self.conn.commit()
+        return digest not in previous
+
+    def close(self) -> None:
+        with self._lock:
+            self.conn.close()
@@ -0,0 +1,400 @@
+from util.gen_util import CsvWriter
+from abc import (ABC, abstractmethod)
+
+import threading
+import logging
+import sqlite3
+import atexit
+import queue
+import time
+import os
+
+
+log = logging.getLogger(__name__)
+
+# declared types of the columns the scraper already converts. other headers are strings
+DEFAULT_COLUMN_TYPES = {
+    'address_listing_price_high': 'int64',
+    'address_listing_price_low': 'int64',
+    'address_bedrooms': 'int64',
+    'address_bathrooms': 'int64',
+    'address_car_spaces': 'int64',
+    'property_size': 'float64',
+    'property_distance_from_schools_aggregate': 'float64',
+    'year_sold': 'int64',
+    'month_sold': 'int64'
+}
+
+# output format picked from the outfile extension when not set explicitly
+FORMAT_EXTENSIONS = {
+    '.csv': 'csv',
+    '.parquet': 'parquet',
+    '.arrow': 'arrow',
+    '.feather': 'arrow',
+    '.ipc': 'arrow',
+    '.db': 'sqlite',
+    '.sqlite': 'sqlite',
+    '.sqlite3': 'sqlite'
+}
+
+_SQLITE_TYPES = {
+    'int64': 'INTEGER',
+    'float64': 'REAL',
+    'string': 'TEXT'
+}
+
+# query indexes created on the listings table, for the columns present in the headers
+SQLITE_INDEXES = {
+    'listings_price': ['address_listing_price_high'],
+    'listings_bedrooms': ['address_bedrooms'],
+    'listings_property_type': ['address_property_type'],
+    'listings_sold': ['year_sold', 'month_sold']
+}
+
+_CONVERTERS = {
+    'int64': int,
+    'float64': float,
+    'string': str
+}
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        return pyarrow
+    except ImportError:
+        raise ImportError("Columnar output needs pyarrow. Install it with: pip install pyarrow")
+
+
+# coerces a value to its declared column type. values that do not convert
+# (e.g. a price kept as raw text like 'Contact agent') become nulls
+def _coerce(value, column_type: str):
+    if value is None or value == '':
+        return None
+    try:
+        return _CONVERTERS[column_type](value)
+    except (TypeError, ValueError):
+        return None
+
+
+# outfile when it does not exist yet, else the first free <stem>.<n><ext> part file next to it
+def part_path(outfile: str) -> str:
+    if not os.path.exists(outfile):
+        return outfile
+    stem, extension = os.path.splitext(outfile)
+    part = 1
+    while os.path.exists(f"{stem}.{part}{extension}"):
+        part += 1
+    return f"{stem}.{part}{extension}"
+
+
+class ColumnarWriter(ABC):
+    def __init__(self,
+                 outfile: str,
+                 headers: list,
+                 column_types: dict = None,
+                 row_group_size: int = 10000) -> None:
+        """Typed columnar sink writing buffered rows in row-group batches.
+
+        The schema comes from headers plus the declared column types. Rows are
+        buffered and written as one record batch / row group every
+        row_group_size rows and on close. Subclasses open the actual file.
+        Columnar files cannot be appended to, so when outfile already exists
+        (e.g. a resumed crawl, which skips the rows written before) the run
+        goes to the next free part file <stem>.<n><ext> next to it.
+
+        Parameters
+        ----------
+        outfile (Required) -- output path, existing files are kept and a new part file is written instead
+        headers (Required) -- column names, in order
+        column_types (Optional) -- {column: 'int64' | 'float64' | 'string'} merged over DEFAULT_COLUMN_TYPES
+        row_group_size (Optional) -- rows per written batch
+
+        """
+        self.pa = _import_pyarrow()
+        self.outfile = part_path(outfile)
+        self.headers = headers
+        self.row_group_size = row_group_size
+
+        declared = dict(DEFAULT_COLUMN_TYPES)
+        declared.update(column_types or {})
+        self.column_types = {header: declared.get(header, 'string') for header in headers}
+        self.schema = self.pa.schema([
+            (header, self.pa.string() if column_type == 'string' else getattr(self.pa, column_type)())
+            for header, column_type in self.column_types.items()
+        ])
+
+        if self.outfile != outfile:
+            log.info(f"Output file {outfile} exists, writing this run to {self.outfile}")
+
+        self._lock = threading.RLock()
+        self._buffer = []
+        self._closed = False
+        self._open()
+        atexit.register(self.close)
+
+    # opens outfile with self.schema, called once by __init__
+    @abstractmethod
+    def _open(self) -> None:
+        pass
+
+    # writes one pyarrow RecordBatch, called under the writer's lock
+    @abstractmethod
+    def _write_batch(self, batch) -> None:
+        pass
+
+    # closes outfile after the last batch
+    @abstractmethod
+    def _close_file(self) -> None:
+        pass
+
+    def write(self, data: dict) -> None:
+        with self._lock:
+            self._buffer.append(data)
+            if len(self._buffer) >= self.row_group_size:
+                self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._closed or not self._buffer:
+                return
+            columns = [
+                self.pa.array(
+                    [_coerce(row.get(header), column_type) for row in self._buffer],
+                    type=self.schema.field(header).type
+                )
+                for header, column_type in self.column_types.items()
+            ]
+            self._write_batch(self.pa.RecordBatch.from_arrays(columns, schema=self.schema))
+            self._buffer = []
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self.flush()
+            self._closed = True
+            self._close_file()
+        atexit.unregister(self.close)
+
+
+class ParquetWriter(ColumnarWriter):
+    def _open(self) -> None:
+        import pyarrow.parquet as pq
+        self._writer = pq.ParquetWriter(self.outfile, self.schema, compression='snappy')
+
+    def _write_batch(self, batch) -> None:
+        self._writer.write_table(self.pa.Table.from_batches([batch]))
+
+    def _close_file(self) -> None:
+        self._writer.close()
+
+
+class ArrowIpcWriter(ColumnarWriter):
+    def _open(self) -> None:
+        self._sink = self.pa.OSFile(self.outfile, 'wb')
+        self._writer = self.pa.ipc.new_file(self._sink, self.schema)
+
+    def _write_batch(self, batch) -> None:
+        self._writer.write_batch(batch)
+
+    def _close_file(self) -> None:
+        self._writer.close()
+        self._sink.close()
+
+
+class SqliteWriter(object):
+    def __init__(self,
+                 outfile: str,
+                 headers: list,
+                 column_types: dict = None,
+                 flush_every: int = 50,
+                 flush_interval: float = 5.0) -> None:
+        """SQLite sink upserting listings on address_url, with a price-history table.
+
+        Rows are handed to a background thread which writes them in batches,
+        one transaction per batch, so writes never block the crawl loop. A
+        price_history row is added whenever a listing is new or its price
+        changed since the last scrape.
+
+        Parameters
+        ----------
+        outfile (Required) -- SQLite database path, reused across runs
+        headers (Required) -- column names, address_url is always included as primary key
+        column_types (Optional) -- {column: 'int64' | 'float64' | 'string'} merged over DEFAULT_COLUMN_TYPES
+        flush_every (Optional) -- max rows per transaction
+        flush_interval (Optional) -- max seconds a row waits before it is written
+
+        """
+        self.outfile = outfile
+        self.headers = list(headers) if 'address_url' in headers else ['address_url'] + list(headers)
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+
+        declared = dict(DEFAULT_COLUMN_TYPES)
+        declared.update(column_types or {})
+        self.column_types = {header: declared.get(header, 'string') for header in self.headers}
+        self.track_prices = 'address_listing_price_high' in self.headers
+
+        self._queue = queue.Queue()
+        self._closed = False
+        self._ready = threading.Event()
+        self._error = None
+        self._writer = threading.Thread(target=self._run, name="sqlite-writer", daemon=True)
+        self._writer.start()
+        self._ready.wait()
+        if self._error is not None:
+            raise self._error
+        atexit.register(self.close)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.outfile)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+
+        columns = ', '.join(
+            f"{header} {_SQLITE_TYPES[column_type]}{' PRIMARY KEY' if header == 'address_url' else ''}"
+            for header, column_type in self.column_types.items()
+        )
+        conn.execute(f"CREATE TABLE IF NOT EXISTS listings ({columns}, scraped_at REAL)")
+        existing = {row[1] for row in conn.execute("PRAGMA table_info(listings)")}
+        for header, column_type in self.column_types.items():
+            if header not in existing:
+                conn.execute(f"ALTER TABLE listings ADD COLUMN {header} {_SQLITE_TYPES[column_type]}")
+
+        for name, index_columns in SQLITE_INDEXES.items():
+            if all(column in self.headers for column in index_columns):
+                conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON listings ({', '.join(index_columns)})")
+
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS price_history (
+                address_url TEXT,
+                price_high INTEGER,
+                price_low INTEGER,
+                observed_at REAL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS price_history_url ON price_history (address_url, observed_at)")
+        conn.commit()
+        return conn
+
+    def _run(self) -> None:
+        try:
+            conn = self._connect()
+        except Exception as e:
+            self._error = e
+            self._ready.set()
+            return
+        self._ready.set()
+
+        columns = self.headers + ['scraped_at']
+        upsert = (
+            f"INSERT INTO listings ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+            f"ON CONFLICT(address_url) DO UPDATE SET "
+            + ', '.join(f"{column} = excluded.{column}" for column in columns if column != 'address_url')
+        )
+        # new listing or changed price, compared against the row before it is upserted
+        price_change = """
+            INSERT INTO price_history (address_url, price_high, price_low, observed_at)
+            SELECT ?, ?, ?, ? WHERE NOT EXISTS (
+                SELECT 1 FROM listings
+                WHERE address_url = ? AND address_listing_price_high IS ? AND address_listing_price_low IS ?
+            )
+        """
+
+        url = self.headers.index('address_url')
+        stopping = False
+        while not stopping:
+            batch, flushed = [], []
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.flush_every:
+                try:
+                    row = self._queue.get(timeout=max(deadline - time.monotonic(), 0.01))
+                except queue.Empty:
+                    break
+                if row is None:
+                    stopping = True
+                    break
+                # flush() marker: the rows queued before it are written with this batch
+                if isinstance(row, threading.Event):
+                    flushed.append(row)
+                    break
+                batch.append(row)
+
+            if batch:
+                self._write_batch(conn, batch, upsert, price_change, url)
+            for event in flushed:
+                event.set()
+
+        conn.close()
+
+    def _write_batch(self, conn: sqlite3.Connection, batch: list, upsert: str, price_change: str, url: int) -> None:
+        now = time.time()
+        # the latest row of a listing scraped twice in one batch, so its price history is checked once
+        latest = {}
+        for row in batch:
+            value = [_coerce(row.get(header), column_type) for header, column_type in self.column_types.items()]
+            latest[value[url]] = value + [now]
+        values = list(latest.values())
+        try:
+            with conn:
+                if self.track_prices:
+                    high = self.headers.index('address_listing_price_high')
+                    low = self.headers.index('address_listing_price_low') if 'address_listing_price_low' in self.headers else None
+                    for value in values:
+                        price_low = value[low] if low is not None else None
+                        conn.execute(
+                            price_change,
+                            (value[url], value[high], price_low, now, value[url], value[high], price_low)
+                        )
+                conn.executemany(upsert, values)
+        except sqlite3.Error as e:
+            log.error(f"Failed writing {len(batch)} rows to {self.outfile}. Error: {e}")
+
+    def write(self, data: dict) -> None:
+        if data.get('address_url') is None:
+            log.warning("Skipping row without address_url for SQLite output")
+            return
+        self._queue.put(data)
+
+    # rows are written by the writer thread, this waits until the rows queued so far are committed
+    def flush(self) -> None:
+        if self._closed:
+            return
+        flushed = threading.Event()
+        self._queue.put(flushed)
+        while not flushed.wait(0.05) and self._writer.is_alive():
+            pass
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._writer.join()
+        atexit.unregister(self.close)
+
+
+# pluggable output sink, selected by output_format or the outfile extension
+def open_sink(outfile: str,
+              headers: list,
+              output_format: str = None,
+              column_types: dict = None,
+              flush_every: int = 50,
+              flush_interval: float = 5.0,
+              row_group_size: int = 10000):
+    if output_format is None:
+        output_format = FORMAT_EXTENSIONS.get(os.path.splitext(outfile)[1].lower(), 'csv')
+
+    if output_format == 'csv':
+        return CsvWriter(outfile, headers, flush_every=flush_every, flush_interval=flush_interval)
+    elif output_format == 'parquet':
+        return ParquetWriter(outfile, headers, column_types=column_types, row_group_size=row_group_size)
+    elif output_format == 'arrow':
+        return ArrowIpcWriter(outfile, headers, column_types=column_types, row_group_size=row_group_size)
+    elif output_format == 'sqlite':
+        return SqliteWriter(
+            outfile, headers, column_types=column_types, flush_every=flush_every, flush_interval=flush_interval
+        )
+    else:
+        raise RuntimeError("Output format %s is not supported" % output_format)
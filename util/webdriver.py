@@ -15,11 +15,8 @@ import os
 import sys
 import subprocess
 import re
-import pkg_resources
-from pyvirtualdisplay import Display
 import random
 import string
-import numpy as np
 import csv
 import shutil
 
@@ -29,10 +26,15 @@ import logging
 
 log = logging.getLogger(__name__)
 
+# pyvirtualdisplay, numpy and pkg_resources are imported by the functions using them, they are slow to
+# import and most callers never need them
+
 AVAILABLE_PROXIES = {}
 
 
 def get_headless_display():
+    from pyvirtualdisplay import Display
+
     display = None
     try:
         display = Display(visible=0, size=(1000, 1000))
@@ -86,6 +88,7 @@ def get_firefox(proxy_type: str,
                 override_proxy: dict = None,
                 override_grid_host: dict = None
                 ) -> webdriver:
+    import pkg_resources
 
     if not use_grid:
         if sys.version_info >= (3, 7):
@@ -250,6 +253,7 @@ def get_chrome(proxy_type: str,
                proxy_creds: dict = None,
                override_proxy: dict = None,
                override_grid_host: dict = None) -> webdriver:
+    import pkg_resources
 
     opts = ChromeOptions()
     caps = DesiredCapabilities.CHROME.copy()
@@ -374,13 +378,13 @@ class wait_for_page_load(object):
             _wait_for(self.page_has_loaded, self.timeout)
 
 
-def _wait_for(condition_function, timeout: int) -> None:
+def _wait_for(condition_function, timeout: int, poll_interval: float = 0.1) -> None:
     start_time = time.time()
     while time.time() < start_time + timeout:
         if condition_function():
             return True
         else:
-            time.sleep(1.0)
+            time.sleep(poll_interval)
     raise TimeoutException(
         'Timeout waiting for {}'.format(condition_function.__name__))
 
@@ -414,6 +418,8 @@ def _set_browser_config(browser: webdriver, config: dict, value: float) -> None:
 
 
 def random_user_agent():
+    import numpy as np
+
     with open(
         os.path.expandvars('$RF_ROOT/python/src/recordedfuture/apps/ha_torvest/lib/useragents.tsv')
     ) as infile: